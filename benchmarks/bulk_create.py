@@ -0,0 +1,79 @@
+"""Bulk insert throughput: per-object `create` vs `create_many` vs COPY.
+
+Every case runs in its own transaction which is rolled back,
+so the database is left untouched.
+
+    python -m benchmarks.bulk_create --rows 10000
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.user import get_user_crud
+from src.database.database import AsyncSessionLocal
+from src.schemas.user import UserSchemaCreate
+from src.utils.settings import StatusTypeEnum
+
+# far away from real Telegram IDs
+FIRST_ID = 10**15
+
+
+def gen_users(rows: int) -> list[UserSchemaCreate]:
+    return [
+        UserSchemaCreate(id=FIRST_ID + i, status=StatusTypeEnum.new)
+        for i in range(rows)
+    ]
+
+
+async def per_object(session: AsyncSession, users: list[UserSchemaCreate]):
+    for user in users:
+        await get_user_crud().create(session, obj_in=user)
+
+
+async def create_many(session: AsyncSession, users: list[UserSchemaCreate]):
+    await get_user_crud().create_many(session, objs_in=users)
+
+
+async def create_many_no_returning(
+    session: AsyncSession, users: list[UserSchemaCreate]
+):
+    await get_user_crud().create_many(session, objs_in=users, returning=False)
+
+
+async def copy_many(session: AsyncSession, users: list[UserSchemaCreate]):
+    await get_user_crud().copy_many(session, objs_in=users)
+
+
+CASES: dict[str, Callable[..., Awaitable]] = {
+    "create (per object)": per_object,
+    "create_many": create_many,
+    "create_many returning=False": create_many_no_returning,
+    "copy_many": copy_many,
+}
+
+
+async def run_case(case: Callable[..., Awaitable], rows: int) -> float:
+    users = gen_users(rows)
+    async with AsyncSessionLocal() as session:
+        start = perf_counter()
+        await case(session, users)
+        await session.flush()
+        elapsed = perf_counter() - start
+        await session.rollback()
+    return rows / elapsed
+
+
+async def main(rows: int):
+    print(f"Rows: {rows}")
+    for name, case in CASES.items():
+        print(f"{name:<30} {await run_case(case, rows):>12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    asyncio.run(main(parser.parse_args().rows))
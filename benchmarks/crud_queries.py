@@ -0,0 +1,72 @@
+"""Per-call latency of the CRUDBase lookups by a filter dict.
+
+Inserts a user and a few tariffs in a transaction which is rolled back.
+
+    python -m benchmarks.crud_queries --calls 5000
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.tariff import get_tariff_crud
+from src.crud.user import get_user_crud
+from src.database.database import AsyncSessionLocal
+from src.models.tariff import Tariff
+from src.schemas.user import UserSchemaCreate
+from src.utils.settings import StatusTypeEnum
+
+USER_ID = 10**15
+
+
+async def get_one_raw(session: AsyncSession):
+    await get_user_crud().get_one_raw(session, id=USER_ID)
+
+
+async def get_one(session: AsyncSession):
+    await get_user_crud().get_one(session, id=USER_ID)
+
+
+async def get_multi_raw(session: AsyncSession):
+    await get_user_crud().get_multi_raw(
+        session, limit=10, status=StatusTypeEnum.paid
+    )
+
+
+async def get_multi_ordered(session: AsyncSession):
+    await get_tariff_crud().get_multi(session, order_by=Tariff.days)
+
+
+CASES: dict[str, Callable[[AsyncSession], Awaitable]] = {
+    "get_one_raw(id=)": get_one_raw,
+    "get_one(id=)": get_one,
+    "get_multi_raw(status=, limit=)": get_multi_raw,
+    "get_multi(order_by=)": get_multi_ordered,
+}
+
+
+async def main(calls: int):
+    async with AsyncSessionLocal() as session:
+        await get_user_crud().create(
+            session,
+            obj_in=UserSchemaCreate(id=USER_ID, status=StatusTypeEnum.paid),
+        )
+        print(f"Calls: {calls}")
+        for name, case in CASES.items():
+            for _ in range(100):
+                await case(session)
+            start = perf_counter()
+            for _ in range(calls):
+                await case(session)
+            elapsed = perf_counter() - start
+            print(f"{name:<32} {elapsed / calls * 10**6:>8.1f} us/call")
+        await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().calls))
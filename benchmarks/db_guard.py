@@ -0,0 +1,46 @@
+"""Guards of the benchmarks writing to the configured database.
+
+They run only with `--allow-db-writes` and only if there are no test
+users yet, afterwards they delete exactly the rows they created."""
+
+from argparse import ArgumentParser, Namespace
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.user import get_user_crud
+from src.models.user import User
+from src.utils.settings import get_settings
+
+# far away from real Telegram IDs
+FIRST_ID = 10**15
+
+
+def database() -> str:
+    settings = get_settings().db
+    return f"{settings.name} at {settings.host}:{settings.port}"
+
+
+def add_db_writes_argument(parser: ArgumentParser):
+    parser.add_argument(
+        "--allow-db-writes",
+        action="store_true",
+        help=f"Insert and delete test users, IDs from {FIRST_ID}, "
+        f"in the configured database ({database()})",
+    )
+
+
+def check_db_writes(parser: ArgumentParser, args: Namespace):
+    if not args.allow_db_writes:
+        parser.error(
+            f"writes test users to {database()}, "
+            f"pass --allow-db-writes to run it"
+        )
+
+
+async def test_users_exist(session: AsyncSession) -> bool:
+    """Users left by someone else, they aren't ours to delete"""
+    return bool(
+        await get_user_crud().get_multi_raw(
+            session, limit=1, operator_expressions=[User.id >= FIRST_ID]
+        )
+    )
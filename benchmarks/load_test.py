@@ -0,0 +1,302 @@
+"""Offline load test: the bot routers fed with realistic updates through
+`Dispatcher.feed_update`, a fake Bot API session and the configured
+database.
+
+Every user goes through /start, the main and the subscription menus,
+a tariff choice, the pre-checkout, a successful payment and the VPN link,
+one user per worker at a time. One pass per user keeps it within
+the antiflood limits. Test users and their payments are written to
+the configured database, so it runs only with `--allow-db-writes`,
+and they are deleted afterwards.
+
+    python -m benchmarks.load_test --allow-db-writes --users 1000
+"""
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable, Iterator
+from datetime import datetime
+from itertools import count
+from math import ceil
+from time import perf_counter
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ChatType, ParseMode
+from aiogram.fsm.strategy import FSMStrategy
+from aiogram.types import Chat, Message, TelegramObject, Update
+
+from benchmarks.db_guard import (
+    FIRST_ID,
+    add_db_writes_argument,
+    check_db_writes,
+    database,
+    test_users_exist,
+)
+from src.bot.callback.user_callback import BuyCallback, ButtonCallback
+from src.bot.middlewares.outgoing import get_outgoing_limiter
+from src.bot.middlewares.route import RoutedMiddleware
+from src.bot.routes.admin_routes import get_admin_router
+from src.bot.routes.payment_routes import get_payment_router
+from src.bot.routes.user_routes import get_user_router
+from src.crud.payment import get_payment_crud
+from src.crud.user import get_user_crud
+from src.database.database import AsyncSessionLocal
+from src.models.payment import Payment
+from src.schemas.tariff import TariffSchema
+from src.utils.logs import reinit_logger
+from src.utils.settings import get_settings
+from src.utils.tariff import get_tariff_catalog
+from src.utils.user import get_known_users
+
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "Pushka VPN"}
+
+
+class FakeSession(BaseSession):
+    """Bot API stand-in answering every request after the latency"""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self._latency = latency
+        self._message_ids = count(1)
+        self.requests = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests += 1
+        await asyncio.sleep(self._latency)
+        if getattr(method, "__returning__", None) is Message:
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type=ChatType.PRIVATE),
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class LatencyRecorder(RoutedMiddleware):
+    """Dispatcher outer middleware: update handling time by the handler"""
+
+    def __init__(self):
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        route = self.route(data)
+        start = perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors[route.name] += 1
+            raise
+        finally:
+            self.latencies[route.name].append(perf_counter() - start)
+
+
+def charge_id(user_id: int) -> str:
+    return f"load-test-{user_id}"
+
+
+def user_updates(
+    user_id: int, tariff: TariffSchema, update_ids: Iterator[int]
+) -> Iterator[dict]:
+    """Updates of one user from /start to the paid subscription link"""
+    user = {"id": user_id, "is_bot": False, "first_name": "Load"}
+    chat = {"id": user_id, "type": "private"}
+    bot_message = {
+        "message_id": 1,
+        "date": 0,
+        "chat": chat,
+        "from": BOT_USER,
+        "text": "menu",
+    }
+    payload = f"tariff_{tariff.id}"
+    currency = get_settings().pay.currency
+
+    def message(**fields) -> dict:
+        return {
+            "update_id": next(update_ids),
+            "message": {
+                "message_id": 2,
+                "date": 0,
+                "chat": chat,
+                "from": user,
+                **fields,
+            },
+        }
+
+    def callback(data: str) -> dict:
+        update_id = next(update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": user,
+                "chat_instance": str(user_id),
+                "message": bot_message,
+                "data": data,
+            },
+        }
+
+    yield message(text="/start")
+    yield callback(ButtonCallback(button="menu").pack())
+    yield callback(ButtonCallback(button="buymenu").pack())
+    yield callback(BuyCallback(tariff_id=tariff.id).pack())
+    update_id = next(update_ids)
+    yield {
+        "update_id": update_id,
+        "pre_checkout_query": {
+            "id": str(update_id),
+            "from": user,
+            "currency": currency,
+            "total_amount": tariff.price,
+            "invoice_payload": payload,
+        },
+    }
+    yield message(
+        successful_payment={
+            "currency": currency,
+            "total_amount": tariff.price,
+            "invoice_payload": payload,
+            "telegram_payment_charge_id": charge_id(user_id),
+            "provider_payment_charge_id": "",
+        }
+    )
+    yield callback(ButtonCallback(button="link").pack())
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[max(ceil(q * len(values)) - 1, 0)]
+
+
+def print_report(
+    recorder: LatencyRecorder, elapsed: float, session: FakeSession
+):
+    total = sum(len(values) for values in recorder.latencies.values())
+    print(
+        f"Updates: {total} in {elapsed:.2f} s, "
+        f"{total / elapsed:.0f} updates/s, "
+        f"Bot API requests: {session.requests}"
+    )
+    print(
+        f"{'handler':<42} {'count':>7} {'errors':>6} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for name, values in sorted(recorder.latencies.items()):
+        values.sort()
+        print(
+            f"{name:<42} {len(values):>7} {recorder.errors[name]:>6} "
+            f"{percentile(values, 0.5) * 1000:>8.2f} "
+            f"{percentile(values, 0.95) * 1000:>8.2f} "
+            f"{percentile(values, 0.99) * 1000:>8.2f} "
+            f"{values[-1] * 1000:>8.2f}"
+        )
+
+
+async def delete_test_users(user_ids: list[int]):
+    """Subscriptions and provision jobs are deleted by the cascade"""
+    async with AsyncSessionLocal() as session:
+        await get_payment_crud().delete(
+            session,
+            [Payment.charge_id.in_([charge_id(id_) for id_ in user_ids])],
+        )
+        await get_user_crud().delete_many(session, ids=user_ids)
+        await session.commit()
+
+
+async def main(users: int, concurrency: int, latency: float, limiter: bool):
+    reinit_logger("WARNING", None)
+    tariffs = await get_tariff_catalog().get_all()
+    if not tariffs:
+        print("No tariffs in the database")
+        return
+    async with AsyncSessionLocal() as db_session:
+        if await test_users_exist(db_session):
+            print(
+                f"Users with IDs from {FIRST_ID} exist in {database()}, "
+                f"delete them first"
+            )
+            return
+    await get_known_users().warm_up()
+
+    session = FakeSession(latency)
+    if limiter:
+        session.middleware(get_outgoing_limiter())
+    bot = Bot(
+        "42:LOAD-TEST",
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN_V2),
+    )
+    dp = Dispatcher(fsm_strategy=FSMStrategy.USER_IN_CHAT)
+    dp.include_routers(
+        get_admin_router(), get_user_router(), get_payment_router()
+    )
+    recorder = LatencyRecorder()
+    recorder.setup(dp)
+
+    update_ids = count(1)
+    user_ids = list(range(FIRST_ID, FIRST_ID + users))
+    queue: asyncio.Queue[list[Update]] = asyncio.Queue()
+    for user_id in user_ids:
+        queue.put_nowait(
+            [
+                Update.model_validate(update, context={"bot": bot})
+                for update in user_updates(user_id, tariffs[0], update_ids)
+            ]
+        )
+
+    async def worker():
+        while not queue.empty():
+            for update in queue.get_nowait():
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception:
+                    # counted by the recorder
+                    pass
+
+    print(
+        f"Users: {users}, concurrency: {concurrency}, "
+        f"Bot API latency: {latency * 1000:.0f} ms, "
+        f"outgoing limiter: {'on' if limiter else 'off'}"
+    )
+    try:
+        start = perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = perf_counter() - start
+        print_report(recorder, elapsed, session)
+    finally:
+        await delete_test_users(user_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    add_db_writes_argument(parser)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Bot API latency, s"
+    )
+    parser.add_argument(
+        "--limiter",
+        action="store_true",
+        help="Send through the outgoing limiter (Telegram rate limits)",
+    )
+    args = parser.parse_args()
+    check_db_writes(parser, args)
+    asyncio.run(main(args.users, args.concurrency, args.latency, args.limiter))
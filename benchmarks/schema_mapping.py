@@ -0,0 +1,65 @@
+"""Per-row cost of ORM object -> schema mapping (no database required).
+
+    python -m benchmarks.schema_mapping --rows 100000
+"""
+
+import argparse
+from datetime import datetime
+from time import perf_counter
+
+from src.crud.common import LazySchemaList, SchemaMapper
+from src.crud.user import get_user_crud
+from src.models.user import User
+from src.utils.settings import StatusTypeEnum
+
+
+def gen_users(rows: int) -> list[User]:
+    now = datetime.now()
+    return [
+        User(id=i, status=StatusTypeEnum.paid, link=None, create_datetime=now)
+        for i in range(rows)
+    ]
+
+
+def legacy(users: list[User]):
+    """The previous map_to_schema_result behaviour"""
+    crud = get_user_crud()
+    schema = crud.__orig_bases__[0].__args__[1]
+    return [schema.model_validate(user) for user in users]
+
+
+def validated(users: list[User]):
+    return SchemaMapper(get_user_crud().get_schema).many(users)
+
+
+def lazy_first_page(users: list[User]):
+    """Only the first 20 rows are really used"""
+    mapper = SchemaMapper(get_user_crud().get_schema)
+    return LazySchemaList(users, mapper)[:20]
+
+
+CASES = {
+    "legacy model_validate": legacy,
+    "validated": validated,
+    "lazy, 20 rows used": lazy_first_page,
+}
+
+
+def main(rows: int, repeat: int):
+    users = gen_users(rows)
+    print(f"Rows: {rows}, best of {repeat}")
+    for name, case in CASES.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = perf_counter()
+            case(users)
+            best = min(best, perf_counter() - start)
+        print(f"{name:<25} {best / rows * 10**6:>8.3f} us/row")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
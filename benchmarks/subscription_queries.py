@@ -0,0 +1,117 @@
+"""Subscription queries on a large seeded pushka_vpn_user_tariff,
+with and without the indexes.
+
+Everything runs in one transaction which is rolled back
+(PostgreSQL DDL is transactional, so the indexes are dropped only
+inside it).
+
+    python -m benchmarks.subscription_queries --rows 200000
+"""
+
+import argparse
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.tariff import get_tariff_crud
+from src.crud.user import get_user_crud
+from src.crud.user_tariff import get_user_tariff_crud
+from src.database.database import AsyncSessionLocal
+from src.schemas.tariff import TariffSchemaCreate
+from src.utils.settings import StatusTypeEnum
+
+# far away from real Telegram IDs
+FIRST_ID = 10**15
+INDEXES = [
+    "ix_pushka_vpn_user_tariff_user_id_expire_datetime",
+    "ix_pushka_vpn_user_tariff_expire_datetime_not_expired",
+]
+
+
+async def seed(session: AsyncSession, rows: int):
+    tariff = await get_tariff_crud().create(
+        session, obj_in=TariffSchemaCreate(price=100, days=30)
+    )
+    users = rows // 2
+    await get_user_crud().copy_many(
+        session,
+        objs_in=[
+            {"id": FIRST_ID + i, "status": StatusTypeEnum.paid}
+            for i in range(users)
+        ],
+    )
+    now = datetime.now()
+    expire_datetimes = [
+        now + timedelta(minutes=random.randint(-60 * 24 * 60, 60 * 24 * 60))
+        for _ in range(rows)
+    ]
+    await get_user_tariff_crud().copy_many(
+        session,
+        objs_in=[
+            {
+                "user_id": FIRST_ID + i % users,
+                "tariff_id": tariff.id,
+                "expire_datetime": expire_datetime,
+                # the most of old subscriptions are already processed,
+                # the future ones can't be
+                "expired": expire_datetime <= now and random.random() < 0.9,
+            }
+            for i, expire_datetime in enumerate(expire_datetimes)
+        ],
+    )
+    await session.execute(text("ANALYZE pushka_vpn_user_tariff"))
+
+
+async def active_subscription(session: AsyncSession, users: int):
+    user_id = FIRST_ID + random.randrange(users)
+    await get_user_tariff_crud().get_active_raw(session, user_id)
+
+
+async def expiring_tomorrow(session: AsyncSession, _: int):
+    await get_user_tariff_crud().get_expiring_raw(
+        session, before=datetime.now() + timedelta(days=1), limit=500
+    )
+
+
+CASES: dict[str, Callable[[AsyncSession, int], Awaitable]] = {
+    "active subscription of a user": active_subscription,
+    "next 500 expiring till tomorrow": expiring_tomorrow,
+}
+
+
+async def run_cases(session: AsyncSession, users: int, calls: int):
+    for name, case in CASES.items():
+        start = perf_counter()
+        for _ in range(calls):
+            await case(session, users)
+        elapsed = perf_counter() - start
+        print(f"  {name:<34} {elapsed / calls * 1000:>8.3f} ms/query")
+
+
+async def main(rows: int, calls: int):
+    async with AsyncSessionLocal() as session:
+        print(f"Seeding {rows} subscriptions...")
+        await seed(session, rows)
+
+        print("With indexes:")
+        await run_cases(session, rows // 2, calls)
+
+        for index in INDEXES:
+            await session.execute(text(f"DROP INDEX {index}"))
+        print("Without indexes:")
+        await run_cases(session, rows // 2, calls)
+
+        await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.calls))
@@ -0,0 +1,268 @@
+"""Micro-benchmarks of the hot paths: CRUD calls, schema mapping,
+keyboards, callback data and helpers. Each case reports the best
+per-call time of `--repeat` rounds of at least `--min-time` seconds.
+
+Save a baseline, change the code, then compare with it (exit code 1
+on a slowdown over `--threshold`):
+
+    python -m benchmarks.suite --save /tmp/baseline.json
+    python -m benchmarks.suite --compare /tmp/baseline.json
+
+The database cases insert test users into the configured database
+and delete them afterwards, they run only with `--allow-db-writes`.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import re
+import sys
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from itertools import count
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.db_guard import (
+    FIRST_ID,
+    add_db_writes_argument,
+    database,
+    test_users_exist,
+)
+from src.bot.callback.user_callback import BuyCallback, ButtonCallback
+from src.bot.kb import user_kb
+from src.crud.common import CRUDBase, map_to_schema_result
+from src.crud.user import get_user_crud
+from src.database.database import AsyncSessionLocal
+from src.models.user import User
+from src.schemas.tariff import TariffSchema
+from src.schemas.user import UserSchemaCreate
+from src.utils.common import camel_to_snake
+from src.utils.logs import reinit_logger
+from src.utils.settings import StatusTypeEnum
+
+# the users of the get_multi case
+MULTI_ROWS = 100
+MAPPED_ROWS = 10000
+BENCH_LINK = "benchmark"
+
+CaseType = Callable[[], object] | Callable[[], Awaitable]
+
+
+@map_to_schema_result
+async def _mapped_rows(crud: CRUDBase, rows: list[User]) -> list[User]:
+    return rows
+
+
+def cpu_cases() -> dict[str, CaseType]:
+    now = datetime.now()
+    users = [
+        User(id=i, status=StatusTypeEnum.paid, link=None, create_datetime=now)
+        for i in range(MAPPED_ROWS)
+    ]
+    tariffs = [
+        TariffSchema(id=i, days=days, price=days * 5, create_datetime=now)
+        for i, days in enumerate((7, 30, 90, 180, 365), 1)
+    ]
+    button_data = ButtonCallback(button="buymenu").pack()
+    buy_data = BuyCallback(tariff_id=3).pack()
+    return {
+        f"map_to_schema_result ({MAPPED_ROWS} rows)": lambda: _mapped_rows(
+            get_user_crud(), users
+        ),
+        "user_kb.main_menu_inkb": user_kb.main_menu_inkb,
+        "user_kb.sub_menu_inkb (5 tariffs)": lambda: user_kb.sub_menu_inkb(
+            tariffs
+        ),
+        "ButtonCallback.pack": lambda: ButtonCallback(button="menu").pack(),
+        "ButtonCallback.unpack": lambda: ButtonCallback.unpack(button_data),
+        "BuyCallback.pack": lambda: BuyCallback(tariff_id=3).pack(),
+        "BuyCallback.unpack": lambda: BuyCallback.unpack(buy_data),
+        "camel_to_snake": lambda: camel_to_snake("ProvisionJob"),
+    }
+
+
+def db_cases(session: AsyncSession, created: list[int]) -> dict[str, CaseType]:
+    """The IDs of the inserted users are added to `created`"""
+    crud = get_user_crud()
+    new_ids = count(FIRST_ID + MULTI_ROWS)
+
+    def create():
+        created.append(user_id := next(new_ids))
+        return crud.create_with_commit(
+            session,
+            obj_in=UserSchemaCreate(id=user_id, status=StatusTypeEnum.new),
+        )
+
+    upsert_obj = {"id": FIRST_ID, "status": StatusTypeEnum.paid}
+    return {
+        "CRUDBase.get_one": lambda: crud.get_one(session, id=FIRST_ID),
+        f"CRUDBase.get_multi ({MULTI_ROWS} rows)": lambda: crud.get_multi(
+            session, link=BENCH_LINK
+        ),
+        "CRUDBase.create_with_commit": create,
+        "CRUDBase.upsert_an_obj (update)": lambda: crud.upsert_an_obj(
+            session, ["id"], upsert_obj
+        ),
+        # the tariff catalog is cached after the first call
+        "user_kb.get_sub_menu": user_kb.get_sub_menu,
+    }
+
+
+async def measure(case: CaseType, min_time: float, repeat: int) -> float:
+    """Best per-call time, seconds"""
+    is_async = asyncio.iscoroutine(result := case())
+    if is_async:
+        await result
+
+    async def run(calls: int) -> float:
+        start = perf_counter()
+        if is_async:
+            for _ in range(calls):
+                await case()
+        else:
+            for _ in range(calls):
+                case()
+        return perf_counter() - start
+
+    calls = 1
+    while (elapsed := await run(calls)) < min_time:
+        calls = max(calls * 2, int(calls * min_time / max(elapsed, 1e-9)))
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        best = min(best, await run(calls) / calls)
+    return best
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+async def run_db_cases(
+    pattern: re.Pattern, min_time: float, repeat: int
+) -> dict[str, float]:
+    crud = get_user_crud()
+    results = {}
+    async with AsyncSessionLocal() as session:
+        if await test_users_exist(session):
+            print(
+                f"Users with IDs from {FIRST_ID} exist in {database()}, "
+                f"the database cases are skipped"
+            )
+            return results
+        created = list(range(FIRST_ID, FIRST_ID + MULTI_ROWS))
+        await crud.create_many(
+            session,
+            objs_in=[
+                UserSchemaCreate(
+                    id=user_id, status=StatusTypeEnum.paid, link=BENCH_LINK
+                )
+                for user_id in created
+            ],
+            returning=False,
+        )
+        await session.commit()
+        try:
+            for name, case in db_cases(session, created).items():
+                if pattern.search(name):
+                    results[name] = await measure(case, min_time, repeat)
+                    print(f"{name:<42} {format_time(results[name]):>10}")
+        finally:
+            await session.rollback()
+            await crud.delete_many(session, ids=created)
+            await session.commit()
+    return results
+
+
+async def run(
+    pattern: re.Pattern, min_time: float, repeat: int, db: bool
+) -> dict[str, float]:
+    results = {}
+    for name, case in cpu_cases().items():
+        if pattern.search(name):
+            results[name] = await measure(case, min_time, repeat)
+            print(f"{name:<42} {format_time(results[name]):>10}")
+    if db:
+        results |= await run_db_cases(pattern, min_time, repeat)
+    return results
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> bool:
+    """Print the changes, True if nothing got slower over the threshold"""
+    print(f"\n{'case':<42} {'baseline':>10} {'current':>10} {'change':>8}")
+    ok = True
+    for name, current in results.items():
+        if (base := baseline.get(name)) is None:
+            print(f"{name:<42} {'-':>10} {format_time(current):>10}")
+            continue
+        change = current / base - 1
+        mark = ""
+        if change > threshold:
+            mark, ok = "  slower", False
+        elif change < -threshold:
+            mark = "  faster"
+        print(
+            f"{name:<42} {format_time(base):>10} "
+            f"{format_time(current):>10} {change:>+8.1%}{mark}"
+        )
+    return ok
+
+
+def main(args: argparse.Namespace) -> int:
+    reinit_logger("WARNING", None)
+    print(
+        f"Python {platform.python_version()}, "
+        f"best of {args.repeat} x {args.min_time} s"
+    )
+    results = asyncio.run(
+        run(
+            re.compile(args.only),
+            args.min_time,
+            args.repeat,
+            args.allow_db_writes,
+        )
+    )
+    if args.save:
+        args.save.write_text(
+            json.dumps(
+                {"python": platform.python_version(), "cases": results},
+                indent=2,
+            )
+        )
+        print(f"Baseline saved to {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["cases"]
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--save", type=Path, help="Save results to a file")
+    parser.add_argument(
+        "--compare", type=Path, help="Compare with a saved baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Change ratio reported as slower or faster",
+    )
+    parser.add_argument(
+        "--only", default="", help="Run the cases matching the regex"
+    )
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    add_db_writes_argument(parser)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,127 @@
+"""Telegram stand-in for the webhook mode: POSTs fake message updates
+to the bot webhook with the secret token header, like Telegram does,
+and reports the response statuses and times.
+
+The url and the secret are taken from the bot settings by default.
+Every update comes from its own user starting at `--first-id`,
+these users are stored by the bot as usual.
+
+    python -m benchmarks.webhook_client --updates 1000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from collections.abc import Iterator
+from math import ceil
+from time import perf_counter
+
+import aiohttp
+
+from src.utils.settings import get_settings
+
+# far away from real Telegram IDs
+FIRST_ID = 10**15
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def message_updates(count: int, first_id: int, text: str) -> Iterator[dict]:
+    for i in range(count):
+        user = {"id": first_id + i, "is_bot": False, "first_name": "Hook"}
+        yield {
+            "update_id": i + 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": user["id"], "type": "private"},
+                "from": user,
+                "text": text,
+            },
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[max(ceil(q * len(values)) - 1, 0)]
+
+
+async def main(
+    url: str,
+    secret: str | None,
+    updates: int,
+    concurrency: int,
+    first_id: int,
+    text: str,
+):
+    headers = {SECRET_HEADER: secret} if secret else {}
+    statuses: Counter[int | str] = Counter()
+    latencies: list[float] = []
+    queue = iter(message_updates(updates, first_id, text))
+
+    async def worker(session: aiohttp.ClientSession):
+        for update in queue:
+            start = perf_counter()
+            try:
+                async with session.post(url, json=update) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(perf_counter() - start)
+
+    print(
+        f"POST {url}, updates: {updates}, concurrency: {concurrency}, "
+        f"secret: {'set' if secret else 'not set'}"
+    )
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency), headers=headers
+    ) as session:
+        start = perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = perf_counter() - start
+
+    latencies.sort()
+    print(f"Updates: {updates} in {elapsed:.2f} s, {updates / elapsed:.0f}/s")
+    print(
+        "Statuses: "
+        + ", ".join(f"{status}: {n}" for status, n in statuses.items())
+    )
+    print(
+        f"p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+        f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+        f"max {latencies[-1] * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    settings = get_settings().bot
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--url",
+        default=(
+            f"http://127.0.0.1:{settings.webhook_port}{settings.webhook_path}"
+        ),
+    )
+    parser.add_argument(
+        "--secret",
+        default=settings.webhook_secret,
+        help="Secret token header, the bot setting by default",
+    )
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--first-id", type=int, default=FIRST_ID)
+    parser.add_argument("--text", default="/start", help="Message text")
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.url,
+            args.secret,
+            args.updates,
+            args.concurrency,
+            args.first_id,
+            args.text,
+        )
+    )
@@ -0,0 +1,113 @@
+"""3x-ui client against the local stub: a new session with a login
+per request vs the pooled client, one-by-one vs batch client creation.
+
+    python -m benchmarks.xui_client --ops 1000 --latency 0.005
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+
+import aiohttp
+
+from benchmarks.xui_stub import XuiStub, start_stub
+from src.api.xui import XuiClient
+from src.schemas.xui import XuiClientSchema
+
+
+async def naive_traffic(base_url: str, email: str):
+    """What a client without a shared session does"""
+    async with aiohttp.ClientSession(
+        cookie_jar=aiohttp.CookieJar(unsafe=True)
+    ) as session:
+        await session.post(
+            f"{base_url}/login",
+            data={"username": "admin", "password": "admin"},
+        )
+        async with session.get(
+            f"{base_url}/panel/api/inbounds/getClientTraffics/{email}"
+        ) as response:
+            await response.json()
+
+
+async def run_case(name: str, stub: XuiStub, ops: int, coro_factory):
+    logins, requests = stub.logins, stub.requests
+    start = perf_counter()
+    await coro_factory()
+    elapsed = perf_counter() - start
+    print(
+        f"{name:<34} {ops / elapsed:>9.0f} ops/s "
+        f"logins: {stub.logins - logins:>5} "
+        f"requests: {stub.requests - requests:>5}"
+    )
+
+
+async def main(ops: int, latency: float, concurrency: int):
+    stub = XuiStub(latency=latency)
+    runner, base_url = await start_stub(stub)
+    client = XuiClient(base_url, "admin", "admin", concurrency=concurrency)
+    clients = [XuiClientSchema(email=f"user-{i}") for i in range(ops)]
+    slots = asyncio.Semaphore(concurrency)
+
+    async def limited(coro):
+        async with slots:
+            await coro
+
+    try:
+        await run_case(
+            "add one by one",
+            stub,
+            ops,
+            lambda: asyncio.gather(
+                *(client.add_client(1, one) for one in clients)
+            ),
+        )
+        for one in clients:
+            await client.delete_client(1, one.id)
+        await run_case(
+            "add by one batch",
+            stub,
+            ops,
+            lambda: client.add_clients(1, clients),
+        )
+        emails = [one.email for one in clients]
+        await run_case(
+            "traffic, session + login per call",
+            stub,
+            ops,
+            lambda: asyncio.gather(
+                *(limited(naive_traffic(base_url, email)) for email in emails)
+            ),
+        )
+        await run_case(
+            "traffic, pooled client",
+            stub,
+            ops,
+            lambda: client.get_clients_traffic(emails),
+        )
+        # every session is expired: one login for all the waiters
+        stub.sessions.clear()
+        await run_case(
+            "traffic, after session expiry",
+            stub,
+            ops,
+            lambda: client.get_clients_traffic(emails),
+        )
+        await run_case(
+            "disable, pooled client",
+            stub,
+            ops,
+            lambda: client.disable_clients(1, clients),
+        )
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.ops, args.latency, args.concurrency))
@@ -0,0 +1,183 @@
+"""Local 3x-ui panel stub for the API client checks and benchmarks.
+
+Keeps one inbound in memory, login sessions expire after `session_ttl`
+seconds (the client must log in again on 401).
+
+    python -m benchmarks.xui_stub --port 2053
+"""
+
+import argparse
+import asyncio
+import json
+import secrets
+from time import monotonic
+
+from aiohttp import web
+
+COOKIE = "3x-ui"
+
+
+class XuiStub:
+    def __init__(
+        self,
+        username: str = "admin",
+        password: str = "admin",
+        latency: float = 0.0,
+        session_ttl: float = 3600,
+    ):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.session_ttl = session_ttl
+        self.logins = 0
+        self.requests = 0
+        self.sessions: dict[str, float] = {}
+        self.clients: dict[str, dict] = {}
+        self.inbound = {
+            "id": 1,
+            "remark": "stub",
+            "enable": True,
+            "protocol": "vless",
+            "port": 443,
+            "up": 0,
+            "down": 0,
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/login", self.login)
+        api = "/panel/api/inbounds"
+        app.router.add_get(f"{api}/list", self.list_inbounds)
+        app.router.add_get(f"{api}/get/{{id}}", self.get_inbound)
+        app.router.add_post(f"{api}/addClient", self.add_client)
+        app.router.add_post(
+            f"{api}/updateClient/{{client_id}}", self.update_client
+        )
+        app.router.add_post(
+            f"{api}/{{id}}/delClient/{{client_id}}", self.delete_client
+        )
+        app.router.add_get(
+            f"{api}/getClientTraffics/{{email}}", self.client_traffic
+        )
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.path.startswith("/panel"):
+            expire_at = self.sessions.get(request.cookies.get(COOKIE, ""))
+            if expire_at is None or expire_at < monotonic():
+                return web.json_response(
+                    {"success": False, "msg": "login again"}, status=401
+                )
+        return await handler(request)
+
+    @staticmethod
+    def _ok(obj=None, msg: str = "") -> web.Response:
+        return web.json_response({"success": True, "msg": msg, "obj": obj})
+
+    @staticmethod
+    def _fail(msg: str) -> web.Response:
+        return web.json_response({"success": False, "msg": msg, "obj": None})
+
+    async def login(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if (form.get("username"), form.get("password")) != (
+            self.username,
+            self.password,
+        ):
+            return self._fail("wrong credentials")
+        self.logins += 1
+        token = secrets.token_hex(16)
+        self.sessions[token] = monotonic() + self.session_ttl
+        response = self._ok()
+        response.set_cookie(COOKIE, token)
+        return response
+
+    def _inbound(self) -> dict:
+        return {
+            **self.inbound,
+            "settings": json.dumps({"clients": list(self.clients.values())}),
+            "clientStats": [
+                self._traffic(client) for client in self.clients.values()
+            ],
+        }
+
+    def _traffic(self, client: dict) -> dict:
+        return {
+            "id": 1,
+            "inboundId": self.inbound["id"],
+            "enable": client["enable"],
+            "email": client["email"],
+            "up": 0,
+            "down": 0,
+            "expiryTime": client["expiryTime"],
+            "total": client["totalGB"],
+        }
+
+    async def list_inbounds(self, _: web.Request) -> web.Response:
+        return self._ok([self._inbound()])
+
+    async def get_inbound(self, request: web.Request) -> web.Response:
+        if int(request.match_info["id"]) != self.inbound["id"]:
+            return self._fail("inbound not found")
+        return self._ok(self._inbound())
+
+    async def add_client(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        clients = json.loads(body["settings"])["clients"]
+        if any(client["id"] in self.clients for client in clients):
+            return self._fail("duplicate client")
+        self.clients.update({client["id"]: client for client in clients})
+        return self._ok()
+
+    async def update_client(self, request: web.Request) -> web.Response:
+        client_id = request.match_info["client_id"]
+        if client_id not in self.clients:
+            return self._fail("client not found")
+        body = await request.json()
+        self.clients[client_id] = json.loads(body["settings"])["clients"][0]
+        return self._ok()
+
+    async def delete_client(self, request: web.Request) -> web.Response:
+        if self.clients.pop(request.match_info["client_id"], None) is None:
+            return self._fail("client not found")
+        return self._ok()
+
+    async def client_traffic(self, request: web.Request) -> web.Response:
+        email = request.match_info["email"]
+        for client in self.clients.values():
+            if client["email"] == email:
+                return self._ok(self._traffic(client))
+        return self._ok(None)
+
+
+async def start_stub(
+    stub: XuiStub, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Start the stub, returns the runner and the base url"""
+    runner = web.AppRunner(stub.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+async def main(port: int, latency: float):
+    runner, base_url = await start_stub(XuiStub(latency=latency), port=port)
+    print(f"3x-ui stub on {base_url} (admin / admin)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=2053)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.port, args.latency))
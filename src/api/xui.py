@@ -0,0 +1,221 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from functools import cache
+from typing import Any
+
+import aiohttp
+from loguru import logger
+
+from src.schemas.xui import (
+    XuiClientSchema,
+    XuiClientTrafficSchema,
+    XuiInboundSchema,
+)
+from src.utils.settings import get_settings
+
+
+class XuiApiEx(Exception): ...
+
+
+def to_xui_time(value: datetime | None) -> int:
+    """Panel expiry time: unix milliseconds, 0 is never"""
+    return int(value.timestamp() * 1000) if value is not None else 0
+
+
+class XuiClient:
+    """3x-ui panel API client.
+
+    One long-lived HTTP session keeps the connections alive, the login
+    cookie stays in its cookie jar and is refreshed only on 401.
+    At most `concurrency` requests go to the panel at once"""
+
+    def __init__(
+        self,
+        base_url: str,
+        username: str | None,
+        password: str | None,
+        concurrency: int = 10,
+        timeout: float = 10,
+    ):
+        self._base_url = base_url.rstrip("/")
+        self._credentials = {"username": username, "password": password}
+        self._concurrency = concurrency
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._login_lock = asyncio.Lock()
+        # bumped on every login, 0 is not logged in
+        self._login_version = 0
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._concurrency),
+                # panels are often reached by IP address
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                timeout=self._timeout,
+                # the panel answers 401 instead of the login page redirect
+                headers={"X-Requested-With": "XMLHttpRequest"},
+            )
+            self._login_version = 0
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _send(
+        self, method: str, path: str, **kwargs: Any
+    ) -> tuple[int, dict]:
+        try:
+            async with self.session.request(
+                method, f"{self._base_url}{path}", **kwargs
+            ) as response:
+                if response.status != 200:
+                    return response.status, {}
+                return response.status, await response.json(content_type=None)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            raise XuiApiEx(f"{method} {path} failed: {e!r}") from e
+
+    async def _login(self, version: int):
+        async with self._login_lock:
+            if self._login_version != version:
+                # another request has already logged in
+                return
+            if not all(self._credentials.values()):
+                raise XuiApiEx(
+                    "3x-ui credentials are not set: API_USERNAME, API_PASSWORD"
+                )
+            status, body = await self._send(
+                "POST", "/login", data=self._credentials
+            )
+            if status != 200 or not body.get("success"):
+                raise XuiApiEx(f"Login failed: {status} {body.get('msg')}")
+            self._login_version += 1
+            logger.debug("3x-ui login")
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        async with self._slots:
+            if (version := self._login_version) == 0:
+                await self._login(version)
+                version = self._login_version
+            status, body = await self._send(method, path, **kwargs)
+            if status == 401:
+                await self._login(version)
+                status, body = await self._send(method, path, **kwargs)
+        if status != 200 or not body.get("success"):
+            raise XuiApiEx(f"{method} {path}: {status} {body.get('msg')}")
+        return body.get("obj")
+
+    @staticmethod
+    def _clients_settings(clients: list[XuiClientSchema]) -> str:
+        return json.dumps(
+            {
+                "clients": [
+                    client.model_dump(mode="json", by_alias=True)
+                    for client in clients
+                ]
+            }
+        )
+
+    async def list_inbounds(self) -> list[XuiInboundSchema]:
+        inbounds = await self._request("GET", "/panel/api/inbounds/list")
+        return [XuiInboundSchema.model_validate(obj) for obj in inbounds]
+
+    async def get_inbound(self, inbound_id: int) -> XuiInboundSchema:
+        inbound = await self._request(
+            "GET", f"/panel/api/inbounds/get/{inbound_id}"
+        )
+        return XuiInboundSchema.model_validate(inbound)
+
+    async def list_clients(self, inbound_id: int) -> list[XuiClientSchema]:
+        inbound = await self.get_inbound(inbound_id)
+        clients = json.loads(inbound.settings).get("clients", [])
+        return [XuiClientSchema.model_validate(obj) for obj in clients]
+
+    async def add_clients(
+        self, inbound_id: int, clients: list[XuiClientSchema]
+    ):
+        """Add many clients by one request"""
+        await self._request(
+            "POST",
+            "/panel/api/inbounds/addClient",
+            json={
+                "id": inbound_id,
+                "settings": self._clients_settings(clients),
+            },
+        )
+
+    async def add_client(self, inbound_id: int, client: XuiClientSchema):
+        await self.add_clients(inbound_id, [client])
+
+    async def update_client(self, inbound_id: int, client: XuiClientSchema):
+        await self._request(
+            "POST",
+            f"/panel/api/inbounds/updateClient/{client.id}",
+            json={
+                "id": inbound_id,
+                "settings": self._clients_settings([client]),
+            },
+        )
+
+    async def update_clients(
+        self, inbound_id: int, clients: list[XuiClientSchema]
+    ):
+        """The panel updates one client per request,
+        they run concurrently within the concurrency limit"""
+        await asyncio.gather(
+            *(self.update_client(inbound_id, client) for client in clients)
+        )
+
+    async def disable_clients(
+        self, inbound_id: int, clients: list[XuiClientSchema]
+    ):
+        await self.update_clients(
+            inbound_id,
+            [
+                client.model_copy(update={"enable": False})
+                for client in clients
+            ],
+        )
+
+    async def disable_client(self, inbound_id: int, client: XuiClientSchema):
+        await self.disable_clients(inbound_id, [client])
+
+    async def delete_client(self, inbound_id: int, client_id: uuid.UUID):
+        await self._request(
+            "POST", f"/panel/api/inbounds/{inbound_id}/delClient/{client_id}"
+        )
+
+    async def get_client_traffic(
+        self, email: str
+    ) -> XuiClientTrafficSchema | None:
+        traffic = await self._request(
+            "GET", f"/panel/api/inbounds/getClientTraffics/{email}"
+        )
+        if traffic is None:
+            return None
+        return XuiClientTrafficSchema.model_validate(traffic)
+
+    async def get_clients_traffic(
+        self, emails: list[str]
+    ) -> list[XuiClientTrafficSchema | None]:
+        return await asyncio.gather(
+            *(self.get_client_traffic(email) for email in emails)
+        )
+
+
+@cache
+def get_xui_client() -> XuiClient:
+    settings = get_settings().api
+    return XuiClient(
+        settings.base_url,
+        settings.username,
+        settings.password,
+        concurrency=settings.concurrency,
+        timeout=settings.timeout,
+    )
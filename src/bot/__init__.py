@@ -2,42 +2,173 @@ from aiogram import Bot, Dispatcher, types
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.strategy import FSMStrategy
+from aiohttp import web
 from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
 
+from src.api.xui import get_xui_client
+from src.bot.ingestion import QueuedDispatcher, get_update_store
+from src.bot.middlewares.log_context import LogContextMiddleware
+from src.bot.middlewares.metrics import get_api_metrics, get_update_metrics
+from src.bot.middlewares.outgoing import get_outgoing_limiter
+from src.bot.middlewares.tracing import (
+    get_api_span_middleware,
+    get_tracing_middleware,
+)
+from src.bot.provisioning import get_provisioner
+from src.bot.routes.admin_routes import get_admin_router
 from src.bot.routes.user_routes import get_user_router
 from src.bot.routes.payment_routes import get_payment_router
-from src.database.database import Base, get_engine
+from src.bot.sharding import ShardPool, ShardedDispatcher, consume_shard_queue
+from src.bot.webhook import run_webhook_server
+from src.database.database import Base, dispose_engines, get_engine
+from src.database.pool import warm_up_pool
+from src.utils.broadcast import get_broadcaster
 from src.utils.logs import reinit_logger
-from src.utils.settings import get_settings
+from src.utils.metrics import get_database_metrics, start_metrics_server
+from src.utils.settings import get_settings, BotRunModeEnum
+from src.utils.subscription import get_expiry_scheduler
+from src.utils.tariff import get_tariff_catalog
+from src.utils.tracing import get_profiler
+from src.utils.user import get_known_users
 
 
 class PushkaVpnBot:
-    def __init__(self):
+    def __init__(self, shard_worker: bool = False, shard_index: int = 0):
         self.bot = Bot(
             token=get_settings().bot.token,
             default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN_V2),
         )
-        self.dp = Dispatcher(fsm_strategy=FSMStrategy.USER_IN_CHAT)
+        if get_settings().tracing.enabled:
+            # outside the limiter: the wait is a child span
+            self.bot.session.middleware(get_api_span_middleware())
+        self.bot.session.middleware(get_outgoing_limiter())
+        if get_settings().metrics.enabled:
+            # inside the limiter: the request itself, not the wait
+            self.bot.session.middleware(get_api_metrics())
+        self.dp = self._create_dispatcher(shard_worker)
+        self._shard_worker = shard_worker
+        # the front process has the first metrics port
+        self._metrics_port_offset = shard_index + 1 if shard_worker else 0
+        self._metrics_server: web.AppRunner | None = None
 
     @staticmethod
-    async def on_startup():
-        reinit_logger(get_settings().log.level, get_settings().log.files_path)
+    def _create_dispatcher(shard_worker: bool) -> Dispatcher:
+        settings = get_settings().bot
+        if shard_worker:
+            # updates come through the shard queue
+            return Dispatcher(fsm_strategy=FSMStrategy.USER_IN_CHAT)
+        if settings.workers > 1:
+            return ShardedDispatcher(
+                ShardPool(settings.workers, settings.shard_queue_size),
+                store=get_update_store(),
+                fsm_strategy=FSMStrategy.USER_IN_CHAT,
+            )
+        return QueuedDispatcher(
+            settings.updates_queue_size,
+            settings.worker_concurrency,
+            store=get_update_store(),
+            fsm_strategy=FSMStrategy.USER_IN_CHAT,
+        )
+
+    @property
+    def is_sharded(self) -> bool:
+        return isinstance(self.dp, ShardedDispatcher)
+
+    async def on_startup(self):
+        log_settings = get_settings().log
+        reinit_logger(
+            log_settings.level,
+            log_settings.files_path,
+            json_logs=log_settings.json_format,
+            enqueue=log_settings.enqueue,
+            sample_limit=log_settings.sample_limit,
+        )
         logger.info("Start telegram bot")
 
         if get_settings().db.host == "127.0.0.1":
             async with get_engine().begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
 
+        if get_settings().metrics.enabled:
+            get_database_metrics().install()
+            try:
+                self._metrics_server = await start_metrics_server(
+                    self._metrics_port_offset
+                )
+            except OSError as e:
+                logger.error(f"Metrics server start failed: {e}")
+
+        if not self.is_sharded:
+            await self._warm_up()
+
+        # one scheduler per bot instance, not per shard worker
+        if (
+            not self._shard_worker
+            and get_settings().subscription.expiry_enabled
+        ):
+            get_expiry_scheduler().start()
+        if not self._shard_worker:
+            try:
+                await get_broadcaster().resume(self.bot)
+            except SQLAlchemyError as e:
+                logger.error(f"Broadcast resume failed: {e}")
+
+        # every process handling payments provisions its own jobs,
+        # the jobs left by the previous run are taken by one of them
+        get_provisioner().start(self.bot)
+        if not self._shard_worker:
+            try:
+                await get_provisioner().resume()
+            except SQLAlchemyError as e:
+                logger.error(f"Provisioning jobs resume failed: {e}")
+
     @staticmethod
-    async def on_shutdown():
-        logger.info("Start telegram bot")
+    async def _warm_up():
+        """Open db connections and fill in-memory caches of the handlers"""
+        db_settings = get_settings().db
+        if db_settings.pool_warm_up:
+            try:
+                await warm_up_pool(get_engine(), db_settings.pool_size)
+            except (SQLAlchemyError, OSError) as e:
+                logger.error(f"Database pool warm up failed: {e}")
+
+        try:
+            await get_tariff_catalog().refresh()
+        except SQLAlchemyError as e:
+            logger.error(f"Tariff catalog warm up failed: {e}")
+
+        try:
+            await get_known_users().warm_up()
+        except SQLAlchemyError as e:
+            logger.error(f"Known users warm up failed: {e}")
+
+    async def on_shutdown(self):
+        logger.info("Stop telegram bot")
+        if self._metrics_server is not None:
+            await self._metrics_server.cleanup()
+        await get_expiry_scheduler().stop()
+        await get_broadcaster().stop()
+        await get_provisioner().stop()
+        get_profiler().stop()
+        await get_xui_client().close()
+        await dispose_engines()
+        # the queued log sinks
+        await logger.complete()
 
     def set_routers(self):
+        self.dp.include_router(get_admin_router())
         self.dp.include_router(get_user_router())
         self.dp.include_router(get_payment_router())
 
     async def _initialize(self):
-        self.set_routers()
+        if not self.is_sharded:
+            self.set_routers()
+            self.dp.update.outer_middleware(LogContextMiddleware())
+            if get_settings().metrics.enabled:
+                get_update_metrics().setup(self.dp)
+            if get_settings().tracing.enabled:
+                get_tracing_middleware().setup(self.dp)
         self.dp.startup.register(self.on_startup)
         self.dp.shutdown.register(self.on_shutdown)
 
@@ -49,16 +180,45 @@ class PushkaVpnBot:
         if get_settings().db.host != "db":
             logger.warning("Using a database on the host")
 
+    async def _run_polling(self):
+        # updates received while the bot was down are handled too
+        await self.bot.delete_webhook(drop_pending_updates=False)
+        await self.dp.start_polling(
+            self.bot,
+            handle_signals=False,
+            # the dispatcher queues updates in the receive order,
+            # a full queue holds the polling loop
+            handle_as_tasks=False,
+            allowed_updates=get_settings().bot.allowed_updates,
+        )
+
+    async def _run_webhook(self):
+        settings = get_settings().bot
+        await self.bot.set_webhook(
+            url=settings.webhook_full_url,
+            secret_token=settings.webhook_secret,
+            allowed_updates=settings.allowed_updates,
+        )
+        await run_webhook_server(self.bot, self.dp)
+
     async def run(self):
         self._check_debug_mode()
         await self._initialize()
-        await self.bot.delete_webhook(drop_pending_updates=True)
         await self.bot.set_my_commands(
             scope=types.BotCommandScopeDefault(),
             commands=get_settings().bot.default_commands,
         )
-        await self.dp.start_polling(
-            self.bot,
-            handle_signals=False,
-            allowed_updates=get_settings().bot.allowed_updates,
-        )
+        if get_settings().bot.run_mode == BotRunModeEnum.webhook:
+            await self._run_webhook()
+        else:
+            await self._run_polling()
+
+    async def run_shard_worker(self, shard_queue):
+        """Handle updates routed by the front process (sharded mode)"""
+        await self._initialize()
+        await self.dp.emit_startup(bot=self.bot)
+        try:
+            await consume_shard_queue(self.bot, self.dp, shard_queue)
+        finally:
+            await self.dp.emit_shutdown(bot=self.bot)
+            await self.bot.session.close()
@@ -0,0 +1,253 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import suppress
+from functools import cache
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.crud.pending_update import get_pending_update_crud
+from src.database.database import AsyncSessionLocal
+from src.models.pending_update import PendingUpdate
+from src.schemas.pending_update import PendingUpdateSchemaCreate
+from src.utils.settings import UpdatesStoreEnum, get_settings
+
+
+class PgUpdateStore:
+    """Received updates log in Postgres.
+
+    An update is saved before Telegram gets the acknowledgement
+    (next getUpdates offset or the webhook response) and deleted
+    after a successful handling, so the not handled ones survive
+    a restart. Deletes are batched, a lost one means the update
+    is handled again.
+
+    A failed handling is counted and the update is replayed on the next
+    start, after `max_attempts` failures it is kept as a dead letter"""
+
+    def __init__(
+        self,
+        ack_interval: float = 0.2,
+        page_size: int = 1000,
+        max_attempts: int = 5,
+    ):
+        self._ack_interval = ack_interval
+        self._page_size = page_size
+        self._max_attempts = max_attempts
+        self._acked: list[int] = []
+        self._flusher: asyncio.Task | None = None
+
+    async def save(self, update: Update) -> bool:
+        """Returns False if the update is already saved"""
+        async with AsyncSessionLocal() as session:
+            created = await get_pending_update_crud().create_or_ignore(
+                session,
+                obj_in=PendingUpdateSchemaCreate(
+                    update_id=update.update_id,
+                    payload=update.model_dump_json(exclude_unset=True),
+                ),
+            )
+            await session.commit()
+        return created
+
+    def ack(self, update_id: int):
+        self._acked.append(update_id)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._ack_interval)
+        await self.flush()
+
+    async def flush(self):
+        acked, self._acked = self._acked, []
+        if not acked:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                await get_pending_update_crud().delete_many(session, ids=acked)
+                await session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Handled updates ack failed: {e}")
+
+    async def fail(self, update_id: int):
+        try:
+            async with AsyncSessionLocal() as session:
+                await get_pending_update_crud().add_attempt(session, update_id)
+                await session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Update {update_id} failed attempt save: {e}")
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flusher
+        await self.flush()
+
+    async def pending(self, bot: Bot) -> AsyncIterator[Update]:
+        """Saved not handled updates in the receive order,
+        the dead letters excluded"""
+        crud = get_pending_update_crud()
+        async with AsyncSessionLocal() as session:
+            dead = await crud.count_dead(session, self._max_attempts)
+        if dead:
+            logger.warning(f"Dead letter updates in the store: {dead}")
+        after = None
+        while True:
+            async with AsyncSessionLocal() as session:
+                page = await crud.get_page_raw(
+                    session,
+                    limit=self._page_size,
+                    after=after,
+                    operator_expressions=[
+                        PendingUpdate.attempts < self._max_attempts
+                    ],
+                )
+            for pending_update in page:
+                yield Update.model_validate_json(
+                    pending_update.payload, context={"bot": bot}
+                )
+            if len(page) < self._page_size:
+                return
+            after = page[-1].update_id
+
+
+@cache
+def get_update_store() -> PgUpdateStore | None:
+    settings = get_settings().bot
+    if settings.updates_store == UpdatesStoreEnum.postgres:
+        return PgUpdateStore(max_attempts=settings.update_max_attempts)
+    return None
+
+
+async def handle_stored_update(
+    store: PgUpdateStore | None, update: Update, handling: Awaitable
+):
+    """Run the update handling, ack the update to the store on success
+    and count the failure otherwise"""
+    try:
+        await handling
+    except Exception as e:
+        logger.exception(f"Update {update.update_id} failed: {e}")
+        if store is not None:
+            await store.fail(update.update_id)
+        return
+    if store is not None:
+        store.ack(update.update_id)
+
+
+class QueuedDispatcher(Dispatcher):
+    """Receiving updates is decoupled from handling.
+
+    `feed_update` only saves the update to the store (if any) and puts
+    it into a bounded queue, a full queue holds the polling loop
+    (or the webhook response), so spikes wait in Telegram instead of
+    the database pool. A pool of consumers handles the updates and acks
+    the handled ones to the store. On startup the saved not handled
+    updates are handled first"""
+
+    # seconds to handle the queued updates on shutdown
+    _DRAIN_TIMEOUT = 30
+
+    def __init__(
+        self,
+        queue_size: int,
+        consumers: int,
+        store: PgUpdateStore | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self._queue: asyncio.Queue[tuple[Bot, Update, dict]] = asyncio.Queue(
+            maxsize=queue_size
+        )
+        self._consumers_count = consumers
+        self._consumers: list[asyncio.Task] = []
+        self._store = store
+        self._replay: asyncio.Task | None = None
+        # the first update received and newly saved after the start,
+        # update IDs grow, so the replay stops there
+        self._live_from: int | None = None
+        # before the bot shutdown hooks, the database is still there
+        self.shutdown.register(self._on_shutdown)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def emit_startup(self, *args: Any, **kwargs: Any) -> None:
+        # after the bot startup hooks: logger, tables and caches are ready
+        await super().emit_startup(*args, **kwargs)
+        await self._on_startup(kwargs["bot"])
+
+    async def _on_startup(self, bot: Bot):
+        self._consumers = [
+            asyncio.create_task(self._consume())
+            for _ in range(self._consumers_count)
+        ]
+        if self._store is not None:
+            self._replay = asyncio.create_task(self._replay_pending(bot))
+
+    async def _replay_pending(self, bot: Bot):
+        replayed = 0
+        try:
+            async for update in self._store.pending(bot):
+                if (
+                    self._live_from is not None
+                    and update.update_id >= self._live_from
+                ):
+                    break
+                await self._queue.put((bot, update, {}))
+                replayed += 1
+        except SQLAlchemyError as e:
+            logger.error(f"Pending updates replay failed: {e}")
+        if replayed:
+            logger.info(f"Pending updates replayed: {replayed}")
+
+    async def _on_shutdown(self):
+        if self._replay is not None:
+            self._replay.cancel()
+            await asyncio.gather(self._replay, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self._queue.join(), self._DRAIN_TIMEOUT)
+        except TimeoutError:
+            logger.warning(
+                f"Not handled updates on shutdown: {self._queue.qsize()}"
+            )
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if self._store is not None:
+            await self._store.close()
+
+    async def _consume(self):
+        while True:
+            bot, update, kwargs = await self._queue.get()
+            try:
+                await handle_stored_update(
+                    self._store, update, self._handle(bot, update, kwargs)
+                )
+            finally:
+                self._queue.task_done()
+
+    async def _handle(self, bot: Bot, update: Update, kwargs: dict):
+        response = await super().feed_update(bot, update, **kwargs)
+        if isinstance(response, TelegramMethod):
+            await self.silent_call_request(bot, response)
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any):
+        if self._store is not None:
+            try:
+                if not await self._store.save(update):
+                    # saved before the restart, handled by the replay,
+                    # which must not stop at it
+                    return
+            except SQLAlchemyError as e:
+                logger.error(f"Update {update.update_id} save failed: {e}")
+        if self._live_from is None:
+            self._live_from = update.update_id
+        await self._queue.put((bot, update, kwargs))
@@ -2,9 +2,8 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from src.bot.callback.user_callback import ButtonCallback, BuyCallback
 from src.bot.kb import user_btn
-from src.crud.tariff import get_tariff_crud
-from src.database.database import AsyncSessionLocal
-from src.models.tariff import Tariff
+from src.schemas.tariff import TariffSchema
+from src.utils.tariff import get_tariff_catalog
 
 
 def main_menu_inkb() -> InlineKeyboardMarkup:
@@ -27,11 +26,28 @@ def main_menu_inkb() -> InlineKeyboardMarkup:
     )
 
 
-async def get_sub_menu():
-    async with AsyncSessionLocal() as session:
-        tariffs = await get_tariff_crud().get_multi(
-            session, order_by=Tariff.days
-        )
+def link_menu_inkb() -> InlineKeyboardMarkup:
+    """User link screen inline keyboard"""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=user_btn.BUY_BTN,
+                    callback_data=ButtonCallback(button="buymenu").pack(),
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    text=user_btn.MAIN_MENU_BTN,
+                    callback_data=ButtonCallback(button="menu").pack(),
+                )
+            ],
+        ]
+    )
+
+
+def sub_menu_inkb(tariffs: list[TariffSchema]) -> InlineKeyboardMarkup:
+    """Subscription menu inline keyboard"""
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
@@ -45,3 +61,8 @@ async def get_sub_menu():
             for tariff in tariffs
         ]
     )
+
+
+async def get_sub_menu() -> InlineKeyboardMarkup:
+    """Pre-built subscription menu of the tariff catalog"""
+    return await get_tariff_catalog().render(sub_menu_inkb)
@@ -0,0 +1,99 @@
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Hashable
+from functools import cache
+from time import monotonic
+from typing import Any, Literal
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+from loguru import logger
+
+from src.bot.msg import user_msg
+from src.utils.settings import get_settings
+
+FloodKind = Literal["callback", "command", "payment"]
+
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per `period` seconds for a key.
+
+    Keys are kept in the last hit order: idle ones are evicted
+    on the way and the store never grows over `max_keys`"""
+
+    def __init__(self, limit: int, period: float, max_keys: int):
+        self._limit = limit
+        self._period = period
+        self._max_keys = max_keys
+        self._windows: OrderedDict[Hashable, deque[float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def _evict(self, now: float):
+        windows = self._windows
+        while windows:
+            window = next(iter(windows.values()))
+            if len(windows) < self._max_keys and (
+                window and window[-1] > now - self._period
+            ):
+                break
+            windows.popitem(last=False)
+
+    def hit(self, key: Hashable) -> bool:
+        """Count the hit, False if the key is over the limit"""
+        now = monotonic()
+        self._evict(now)
+        if (window := self._windows.get(key)) is None:
+            window = self._windows[key] = deque()
+        else:
+            self._windows.move_to_end(key)
+        while window and window[0] <= now - self._period:
+            window.popleft()
+        if len(window) >= self._limit:
+            return False
+        window.append(now)
+        return True
+
+
+class AntiFloodMiddleware(BaseMiddleware):
+    """Inner middleware: drops the user events over the limit
+    before the handler touches the database"""
+
+    def __init__(self, kind: FloodKind, limiter: SlidingWindowLimiter):
+        self._kind = kind
+        self._limiter = limiter
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        # the money is already taken, never drop it
+        is_paid = isinstance(event, Message) and event.successful_payment
+        if user is None or is_paid or self._limiter.hit(user.id):
+            return await handler(event, data)
+
+        logger.trace("User: {!r}. Too many {} events", user.id, self._kind)
+        if isinstance(event, CallbackQuery):
+            # stop the button spinner, no handler and database work
+            await event.answer(user_msg.FLOOD_ALERT_MSG)
+        return None
+
+
+@cache
+def get_antiflood_middleware(kind: FloodKind) -> AntiFloodMiddleware:
+    """One limiter per kind, shared by the routers"""
+    settings = get_settings().throttling
+    limits = {
+        "callback": settings.flood_callback_limit,
+        "command": settings.flood_command_limit,
+        "payment": settings.flood_payment_limit,
+    }
+    return AntiFloodMiddleware(
+        kind,
+        SlidingWindowLimiter(
+            limits[kind], settings.flood_period, settings.flood_max_users
+        ),
+    )
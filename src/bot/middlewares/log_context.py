@@ -0,0 +1,24 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+from loguru import logger
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Dispatcher outer middleware: the update and the user ids are bound
+    to the log records of the update handling"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        with logger.contextualize(
+            update_id=event.update_id,
+            user_id=user.id if user is not None else None,
+        ):
+            return await handler(event, data)
@@ -0,0 +1,95 @@
+from collections.abc import Awaitable, Callable
+from functools import cache
+from time import perf_counter
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from src.bot.middlewares.route import RoutedMiddleware, event_type
+from src.utils.metrics import MetricsRegistry, get_metrics_registry
+
+
+class UpdateMetricsMiddleware(RoutedMiddleware):
+    """Dispatcher outer middleware: update handling time and errors
+    by the router and the handler, filters and middlewares included"""
+
+    def __init__(self, registry: MetricsRegistry):
+        labels = ("router", "handler", "event")
+        self.duration = registry.histogram(
+            "bot_handler_duration_seconds", "Update handling time", labels
+        )
+        self.errors = registry.counter(
+            "bot_handler_errors_total", "Update handling errors", labels
+        )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        route = self.route(data)
+        update_type = event_type(event)
+        start = perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors.inc(route.router, route.handler, update_type)
+            raise
+        finally:
+            self.duration.observe(
+                perf_counter() - start,
+                route.router,
+                route.handler,
+                update_type,
+            )
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware: Telegram Bot API request time
+    by the method, the outgoing limiter wait is not included"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.duration = registry.histogram(
+            "telegram_api_duration_seconds",
+            "Telegram Bot API request time",
+            ("method",),
+        )
+        self.errors = registry.counter(
+            "telegram_api_errors_total",
+            "Failed Telegram Bot API requests",
+            ("method",),
+        )
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        start = perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            self.errors.inc(name)
+            raise
+        finally:
+            self.duration.observe(perf_counter() - start, name)
+
+
+@cache
+def get_update_metrics() -> UpdateMetricsMiddleware:
+    return UpdateMetricsMiddleware(get_metrics_registry())
+
+
+@cache
+def get_api_metrics() -> ApiMetricsMiddleware:
+    return ApiMetricsMiddleware(get_metrics_registry())
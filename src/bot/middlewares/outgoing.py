@@ -0,0 +1,201 @@
+import asyncio
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import cache
+from itertools import count
+from time import perf_counter
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from loguru import logger
+
+from src.utils.ratelimit import TokenBucket
+from src.utils.settings import get_settings
+from src.utils.tracing import span
+
+# lower goes first: replies to the users before mass sending
+METHOD_PRIORITY = {
+    "sendInvoice": 0,
+    "editMessageText": 0,
+    "editMessageReplyMarkup": 0,
+    "sendMessage": 1,
+    "copyMessage": 2,
+    "forwardMessage": 2,
+}
+DEFAULT_PRIORITY = 1
+
+
+@dataclass
+class MethodStats:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    wait_time_total: float = 0.0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    @property
+    def wait_time_avg(self) -> float:
+        return self.wait_time_total / self.calls if self.calls else 0.0
+
+    @property
+    def latency_avg(self) -> float:
+        return self.latency_total / self.calls if self.calls else 0.0
+
+
+class PriorityGate:
+    """Hands out the bucket tokens to the waiters by priority"""
+
+    def __init__(self, bucket: TokenBucket):
+        self._bucket = bucket
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = count()
+        self._pump: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = DEFAULT_PRIORITY):
+        if not self._waiters and self._bucket.try_acquire() == 0:
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        await future
+
+    def pause(self, seconds: float):
+        """Give no tokens for `seconds`, the waiters keep their order"""
+        self._bucket.pause(seconds)
+
+    async def _run(self):
+        while self._waiters:
+            if (delay := self._bucket.try_acquire()) > 0:
+                await asyncio.sleep(delay)
+                continue
+            while self._waiters:
+                *_, future = heapq.heappop(self._waiters)
+                # cancelled waiters don't need the token
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+
+class OutgoingLimiter(BaseRequestMiddleware):
+    """Bot session middleware for the requests to the chats.
+
+    A request waits for its chat token bucket, then for the global one
+    in the method priority order. Flood control errors pause the chat
+    and the global bucket (the error doesn't tell which limit is hit),
+    the request is retried, handlers don't see them.
+    Requests without a chat (f.e. getUpdates) are not limited"""
+
+    def __init__(
+        self,
+        rate: float,
+        chat_rate: float,
+        group_rate: float,
+        chat_burst: int,
+        max_retries: int,
+        max_chats: int = 10000,
+    ):
+        self._gate = PriorityGate(TokenBucket(rate))
+        self._chat_rate = chat_rate
+        self._group_rate = group_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._max_chats = self._chats_limit = max_chats
+        self._chats: dict[int | str, TokenBucket] = {}
+        self.stats: defaultdict[str, MethodStats] = defaultdict(MethodStats)
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        if (bucket := self._chats.get(chat_id)) is not None:
+            return bucket
+        if len(self._chats) >= self._chats_limit:
+            self._chats = {
+                chat: bucket
+                for chat, bucket in self._chats.items()
+                if not bucket.is_idle
+            }
+            self._chats_limit = max(self._max_chats, 2 * len(self._chats))
+        # private chats have positive IDs, groups and channels don't
+        is_private = isinstance(chat_id, int) and chat_id > 0
+        bucket = self._chats[chat_id] = TokenBucket(
+            self._chat_rate if is_private else self._group_rate,
+            self._chat_burst,
+        )
+        return bucket
+
+    async def _wait(self, chat_id: int | str, priority: int):
+        self.queue_depth += 1
+        self.queue_depth_max = max(self.queue_depth_max, self.queue_depth)
+        try:
+            with span("api.throttle"):
+                await self._chat_bucket(chat_id).acquire()
+                await self._gate.acquire(priority)
+        finally:
+            self.queue_depth -= 1
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        name = method.__api_method__
+        priority = METHOD_PRIORITY.get(name, DEFAULT_PRIORITY)
+        stats = self.stats[name]
+        start = perf_counter()
+        await self._wait(chat_id, priority)
+        stats.wait_time_total += perf_counter() - start
+        retries = 0
+        try:
+            while True:
+                try:
+                    return await make_request(bot, method)
+                except TelegramRetryAfter as e:
+                    if retries >= self._max_retries:
+                        raise
+                    retries += 1
+                    stats.retries += 1
+                    logger.warning(
+                        f"Flood control on {name} to chat {chat_id}, "
+                        f"retry in {e.retry_after} s"
+                    )
+                    self._chat_bucket(chat_id).pause(e.retry_after)
+                    self._gate.pause(e.retry_after)
+                    await self._wait(chat_id, priority)
+        except TelegramAPIError:
+            stats.errors += 1
+            raise
+        finally:
+            latency = perf_counter() - start
+            stats.calls += 1
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+
+
+@cache
+def get_outgoing_limiter() -> OutgoingLimiter:
+    settings = get_settings().throttling
+    return OutgoingLimiter(
+        # the Telegram limit is shared by all the shard workers
+        rate=settings.api_rate / get_settings().bot.workers,
+        chat_rate=settings.api_chat_rate,
+        group_rate=settings.api_group_rate,
+        chat_burst=settings.api_chat_burst,
+        max_retries=settings.api_max_retries,
+    )
@@ -0,0 +1,81 @@
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, Update
+from aiogram.types.update import UpdateTypeLookupError
+
+from src.utils.tracing import span
+
+# updates not handled by any handler
+UNHANDLED = "unhandled"
+
+
+@dataclass(slots=True)
+class Route:
+    """The router and the handler which took the update"""
+
+    router: str = UNHANDLED
+    handler: str = UNHANDLED
+
+    @property
+    def name(self) -> str:
+        if self.handler == UNHANDLED:
+            return UNHANDLED
+        return f"{self.router}.{self.handler}"
+
+
+def event_type(update: Update) -> str:
+    try:
+        return update.event_type
+    except UpdateTypeLookupError:
+        return "unknown"
+
+
+class RouteMiddleware(BaseMiddleware):
+    """Inner middleware: fills the update route of the outer middlewares
+    and runs the handler in a span named after it"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if (route := data.get("route")) is None:
+            return await handler(event, data)
+        handler_object: HandlerObject = data["handler"]
+        route.router = data["event_router"].name.rsplit(".", 1)[-1]
+        route.handler = handler_object.callback.__name__
+        with span(route.name):
+            return await handler(event, data)
+
+
+class RoutedMiddleware(BaseMiddleware):
+    """Base of the dispatcher outer middlewares which need to know
+    the handler of the update"""
+
+    def setup(self, dp: Dispatcher):
+        dp.update.outer_middleware(self)
+        route_middleware = get_route_middleware()
+        # inner middlewares of the root observers wrap every handler
+        for name, observer in dp.observers.items():
+            if name in ("update", "error"):
+                continue
+            if route_middleware not in observer.middleware:
+                observer.middleware(route_middleware)
+
+    @staticmethod
+    def route(data: dict[str, Any]) -> Route:
+        """The route shared by all the outer middlewares of the update"""
+        if (route := data.get("route")) is None:
+            route = data["route"] = Route()
+        return route
+
+
+@cache
+def get_route_middleware() -> RouteMiddleware:
+    return RouteMiddleware()
@@ -0,0 +1,72 @@
+from collections.abc import Awaitable, Callable
+from functools import cache
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+from loguru import logger
+
+from src.bot.middlewares.route import UNHANDLED, RoutedMiddleware, event_type
+from src.utils.settings import get_settings
+from src.utils.tracing import span, trace
+
+
+class TracingMiddleware(RoutedMiddleware):
+    """Dispatcher outer middleware: collects the update spans
+    and logs the breakdown of the updates handled slower than
+    the threshold. The handler runs in a span named `router.handler`"""
+
+    def __init__(self, slow_threshold: float, max_spans: int):
+        self._slow_threshold = slow_threshold
+        self._max_spans = max_spans
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        route = self.route(data)
+        context = trace(
+            f"update {event.update_id} ({event_type(event)})", self._max_spans
+        )
+        try:
+            with context as current:
+                return await handler(event, data)
+        finally:
+            # errors included, the trace is finished on the context exit
+            if current.duration >= self._slow_threshold:
+                if route.name != UNHANDLED:
+                    current.name = f"{current.name} -> {route.name}"
+                logger.warning(f"Slow {current.report()}")
+
+
+class ApiSpanMiddleware(BaseRequestMiddleware):
+    """Bot session middleware: Telegram Bot API requests
+    in the update trace spans, the limiter wait included"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with span(f"api.{method.__api_method__}"):
+            return await make_request(bot, method)
+
+
+@cache
+def get_tracing_middleware() -> TracingMiddleware:
+    settings = get_settings().tracing
+    return TracingMiddleware(settings.slow_threshold, settings.max_spans)
+
+
+@cache
+def get_api_span_middleware() -> ApiSpanMiddleware:
+    return ApiSpanMiddleware()
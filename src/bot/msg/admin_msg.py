@@ -0,0 +1,122 @@
+# Статистика пула соединений с БД
+POOL_STATS_MSG = """
+*Пул соединений*
+```
+size:        {size}
+checked in:  {checked_in}
+checked out: {checked_out}
+overflow:    {overflow}
+waits:       {waits}
+wait avg:    {wait_time_avg:.4f} s
+wait max:    {wait_time_max:.4f} s
+```
+"""
+
+# Рассылка
+BROADCAST_USAGE_MSG = """
+Ответьте командой \\/broadcast на сообщение для рассылки
+Отправить только пользователям со статусом\\: \\/broadcast `статус`
+Статусы\\: {statuses}
+"""
+
+BROADCAST_RUNNING_MSG = """
+Рассылка №{id} уже идёт\\. Отменить\\: \\/broadcast\\_cancel
+"""
+
+BROADCAST_STARTED_MSG = """
+Рассылка №{id} запущена ✅
+"""
+
+BROADCAST_STATUS_MSG = """
+*Рассылка №{id}*
+```
+state:     {state}
+sent:      {sent}
+failed:    {failed}
+last user: {last_user_id}
+```
+"""
+
+NO_BROADCAST_MSG = """
+Нет активной рассылки
+"""
+
+BROADCAST_CANCELLED_MSG = """
+Рассылка отменена
+"""
+
+# Статистика запросов к Telegram API
+API_STATS_MSG = """
+*Запросы к Telegram API*
+Очередь\\: {queue_depth}, максимум\\: {queue_depth_max}
+```
+{rows}
+```
+"""
+
+API_STATS_HEADER = (
+    "method                   calls   err retry    avg s    max s   wait s"
+)
+
+API_STATS_ROW = (
+    "{method:<22} {calls:>7} {errors:>5} {retries:>5} "
+    "{latency_avg:>8.3f} {latency_max:>8.3f} {wait_time_avg:>8.3f}"
+)
+
+# Выручка по журналу платежей
+REVENUE_MSG = """
+*Выручка за {period}*
+```
+{rows}
+```
+"""
+
+REVENUE_HEADER = "currency   payments       amount"
+
+REVENUE_ROW = "{currency:<8} {count:>10} {amount:>12}"
+
+REVENUE_USAGE_MSG = """
+Выручка за последние дни\\: \\/revenue `дни`
+"""
+
+# Профилировщик
+PROFILE_USAGE_MSG = """
+Профилирование цикла событий\\: \\/profile `start` \\| `stop`
+"""
+
+PROFILE_STARTED_MSG = """
+Профилировщик запущен ✅ Остановить\\: \\/profile `stop`
+"""
+
+PROFILE_RUNNING_MSG = """
+Профилировщик уже запущен\\. Остановить\\: \\/profile `stop`
+"""
+
+PROFILE_NOT_RUNNING_MSG = """
+Профилировщик не запущен\\. Запустить\\: \\/profile `start`
+"""
+
+PROFILE_MSG = """
+*Профиль за {duration:.0f} с, {samples} сэмплов*
+```
+{rows}
+```
+"""
+
+PROFILE_HEADER = "    own  total  function"
+
+PROFILE_ROW = "{own:>6.1f}% {total:>5.1f}%  {name}"
+
+PROFILE_FILE_CAPTION = "Стеки для flame graph"
+
+# Тарифы
+TARIFFS_RELOADED_MSG = """
+*Тарифы перезагружены*
+```
+{rows}
+```
+"""
+
+TARIFFS_HEADER = "   id   days  price"
+
+TARIFFS_ROW = "{id:>5} {days:>6} {price:>6}"
@@ -12,6 +12,26 @@ HELP_MSG = """
 # Сообщение главного меню
 MAIN_MENU_MSG = """
 *Ваш ID:* `{id}`
+*Статус:* {status}
+"""
+
+# Статусы пользователя
+USER_STATUS = {
+    "new": "новый пользователь",
+    "trial": "пробный период",
+    "free": "бесплатный доступ",
+    "paid": "подписка оплачена",
+    "not paid": "подписка не оплачена",
+}
+
+# Ссылка для подключения
+LINK_MSG = """
+Ссылка для подключения\\: `{link}`
+"""
+
+# Ссылки нет
+NO_LINK_MSG = """
+У вас пока нет активной подписки\\. Оформите её, и ссылка появится здесь
 """
 
 
@@ -29,6 +49,19 @@ COMMON_ERROR_MSG = """
 # Успешная оплата
 SUCCESS_PAY_MSG = """
 Оплата прошла успешно ✅\nID транзакции\\: `{charge_id}`
+Ссылка для подключения придёт следующим сообщением
+"""
+
+# Подписка подключена
+VPN_LINK_MSG = """
+Подписка активна до {expire} 🚀
+Ссылка для подключения\\: `{link}`
+"""
+
+# Не удалось подключить подписку
+PROVISION_FAILED_MSG = """
+Не удалось подключить подписку 😥
+Мы уже разбираемся\\, ID транзакции\\: `{charge_id}`
 """
 
 
@@ -41,3 +74,16 @@ NO_REFUND_MSG = """
 NO_TRANSACTION_ID_MSG = """
 После команды \\/refund укажите\\, пожалуйста\\, ID транзакции
 """
+
+# Платёж не найден
+NO_PAYMENT_MSG = """
+Платёж с таким ID транзакции не найден 🤔
+"""
+
+# Платёж уже возвращён
+ALREADY_REFUNDED_MSG = """
+Оплата по этой транзакции уже возвращена
+"""
+
+# Слишком частые нажатия (текст уведомления, без разметки)
+FLOOD_ALERT_MSG = "Не так быстро 🙏"
@@ -0,0 +1,325 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from functools import cache
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.utils.text_decorations import markdown_decoration
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.api.xui import XuiApiEx, get_xui_client, to_xui_time
+from src.bot.msg import user_msg
+from src.crud.payment import get_payment_crud
+from src.crud.provision_job import get_provision_job_crud
+from src.crud.user import get_user_crud
+from src.crud.user_tariff import get_user_tariff_crud
+from src.database.database import AsyncSessionLocal
+from src.schemas.payment import PaymentSchemaCreate
+from src.schemas.provision_job import (
+    ProvisionJobSchema,
+    ProvisionJobSchemaCreate,
+)
+from src.schemas.tariff import TariffSchema
+from src.schemas.user import UserSchemaCreate
+from src.schemas.user_tariff import UserTariffSchema, UserTariffSchemaCreate
+from src.schemas.xui import XuiClientSchema
+from src.utils.settings import ProvisionStateEnum, StatusTypeEnum, get_settings
+from src.utils.user import get_known_users
+
+# panel clients IDs are derived from the user ID
+_CLIENTS_NAMESPACE = uuid.UUID("0f5c6b0e-6a43-4a3e-9d0b-2f8d3c4b1a77")
+
+
+def get_panel_client(user_id: int, expire: datetime) -> XuiClientSchema:
+    """The user panel client, the same one for all the user payments"""
+    client_id = uuid.uuid5(_CLIENTS_NAMESPACE, str(user_id))
+    return XuiClientSchema(
+        id=client_id,
+        email=f"tg_{user_id}",
+        tg_id=user_id,
+        sub_id=client_id.hex[:16],
+        expiry_time=to_xui_time(expire),
+    )
+
+
+async def record_payment(payment: PaymentSchemaCreate) -> bool:
+    """Save the payment to the ledger before anything else,
+    False if it is already saved"""
+    async with AsyncSessionLocal() as session:
+        created = await get_payment_crud().create_or_ignore(
+            session, obj_in=payment, index_elements=["charge_id"]
+        )
+        await session.commit()
+    return created
+
+
+async def record_purchase(
+    charge_id: str, user_id: int, tariff: TariffSchema
+) -> UserTariffSchema | None:
+    """Save the paid subscription and its provisioning job
+    by one transaction. None if the payment subscription is already
+    recorded"""
+    now = datetime.now()
+    async with AsyncSessionLocal() as session:
+        # the user row lock orders the concurrent payments of the user,
+        # a redelivered payment sees the job of the first one
+        await get_user_crud().upsert(
+            session,
+            obj_in=UserSchemaCreate(id=user_id, status=StatusTypeEnum.paid),
+            update_fields=["status"],
+        )
+        if await get_provision_job_crud().get_multi_raw(
+            session, limit=1, charge_id=charge_id
+        ):
+            await session.rollback()
+            return None
+        user_tariff_crud = get_user_tariff_crud()
+        active = await user_tariff_crud.get_active_raw(session, user_id, now)
+        start = active.expire_datetime if active is not None else now
+        subscription = await user_tariff_crud.create(
+            session,
+            obj_in=UserTariffSchemaCreate(
+                user_id=user_id,
+                tariff_id=tariff.id,
+                expire_datetime=start + timedelta(days=tariff.days),
+            ),
+        )
+        await get_provision_job_crud().create(
+            session,
+            obj_in=ProvisionJobSchemaCreate(
+                charge_id=charge_id,
+                user_id=user_id,
+                user_tariff_id=subscription.id,
+            ),
+        )
+        subscription = user_tariff_crud.schema_mapper.one(subscription)
+        await session.commit()
+    get_known_users().add(user_id)
+    return subscription
+
+
+class Provisioner:
+    """Provisions the paid subscriptions VPN clients in the panel.
+
+    The payment handler only records the purchase and enqueues the job,
+    a pool of workers creates or extends the panel client, writes
+    the user link and sends it to the user.
+
+    Every attempt claims the job in the database first, the claim moves
+    the next attempt forward, so a job is not run twice at once and
+    an attempt lost by a restart is retried. Failed attempts are retried
+    with an exponential backoff. Provisioning is idempotent, the user
+    panel client is updated if it already exists"""
+
+    def __init__(
+        self,
+        workers: int,
+        max_attempts: int,
+        backoff: float,
+        max_backoff: float,
+        inbound_id: int,
+        resume_limit: int = 10000,
+    ):
+        self._workers_count = workers
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._inbound_id = inbound_id
+        self._resume_limit = resume_limit
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._retries: dict[str, asyncio.TimerHandle] = {}
+        self._bot: Bot | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self, bot: Bot):
+        if self.is_running:
+            return
+        self._bot = bot
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"provisioner-{i}")
+            for i in range(self._workers_count)
+        ]
+
+    async def stop(self):
+        for retry in self._retries.values():
+            retry.cancel()
+        self._retries.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def resume(self):
+        """Enqueue the pending jobs left by the previous run"""
+        async with AsyncSessionLocal() as session:
+            pending = await get_provision_job_crud().get_pending(
+                session, limit=self._resume_limit
+            )
+        now = datetime.now()
+        for charge_id, next_attempt in pending:
+            self.enqueue(charge_id, (next_attempt - now).total_seconds())
+        if pending:
+            logger.info(f"Pending provisioning jobs resumed: {len(pending)}")
+
+    def enqueue(self, charge_id: str, delay: float = 0):
+        if (retry := self._retries.pop(charge_id, None)) is not None:
+            retry.cancel()
+        if delay <= 0:
+            self._queue.put_nowait(charge_id)
+            return
+        self._retries[charge_id] = asyncio.get_running_loop().call_later(
+            delay, self._enqueue_retry, charge_id
+        )
+
+    def _enqueue_retry(self, charge_id: str):
+        self._retries.pop(charge_id, None)
+        self._queue.put_nowait(charge_id)
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self._backoff * 2 ** (attempts - 1), self._max_backoff)
+
+    async def _worker(self):
+        while True:
+            charge_id = await self._queue.get()
+            try:
+                await self._attempt(charge_id)
+            except SQLAlchemyError as e:
+                # a claimed job is due again after the claim lease
+                logger.error(f"Provisioning {charge_id!r} failed: {e}")
+                self.enqueue(charge_id, self._max_backoff + 1)
+            except Exception as e:
+                logger.exception(f"Provisioning {charge_id!r} failed: {e}")
+                self.enqueue(charge_id, self._max_backoff + 1)
+            finally:
+                self._queue.task_done()
+
+    async def _attempt(self, charge_id: str):
+        crud = get_provision_job_crud()
+        async with AsyncSessionLocal() as session:
+            job = await crud.claim(
+                session,
+                charge_id,
+                now=datetime.now(),
+                lease=timedelta(seconds=self._max_backoff),
+            )
+            if job is None:
+                # done, failed or claimed by another attempt
+                await session.rollback()
+                return
+            job = crud.schema_mapper.one(job)
+            await session.commit()
+
+        try:
+            link, expire = await self._provision(job)
+        except XuiApiEx as e:
+            await self._fail(job, str(e))
+            return
+        except SQLAlchemyError:
+            raise
+        except Exception as e:
+            # f.e. an unexpected panel response, retried like API errors
+            logger.exception(f"Provisioning {charge_id!r} error: {e}")
+            await self._fail(job, f"{type(e).__name__}: {e}")
+            return
+
+        async with AsyncSessionLocal() as session:
+            await get_user_crud().update(
+                session,
+                update_filter={"id": job.user_id},
+                update_values={"link": link},
+            )
+            await crud.finish(session, charge_id, ProvisionStateEnum.done)
+            await session.commit()
+        logger.info(
+            f"User: {job.user_id!r}. Provisioned, attempt {job.attempts}"
+        )
+        await self._notify(
+            job.user_id,
+            user_msg.VPN_LINK_MSG.format(
+                expire=markdown_decoration.quote(f"{expire:%d.%m.%Y %H:%M}"),
+                link=link,
+            ),
+        )
+
+    async def _provision(
+        self, job: ProvisionJobSchema
+    ) -> tuple[str, datetime]:
+        """Create or extend the user panel client till the user
+        subscription end, returns the subscription link and the end"""
+        user_tariff_crud = get_user_tariff_crud()
+        async with AsyncSessionLocal() as session:
+            subscription = await user_tariff_crud.get_active_raw(
+                session, job.user_id
+            ) or await user_tariff_crud.get_one_raw(
+                session, id=job.user_tariff_id
+            )
+            expire = subscription.expire_datetime
+
+        client = get_panel_client(job.user_id, expire)
+        xui = get_xui_client()
+        if await xui.get_client_traffic(client.email) is None:
+            await xui.add_client(self._inbound_id, client)
+        else:
+            await xui.update_client(self._inbound_id, client)
+        return get_settings().api.subscription_link(client.sub_id), expire
+
+    async def _fail(self, job: ProvisionJobSchema, error: str):
+        crud = get_provision_job_crud()
+        if job.attempts < self._max_attempts:
+            delay = self._retry_delay(job.attempts)
+            logger.warning(
+                f"Provisioning {job.charge_id!r} attempt {job.attempts} "
+                f"failed, retry in {delay} s: {error}"
+            )
+            async with AsyncSessionLocal() as session:
+                await crud.retry_later(
+                    session,
+                    job.charge_id,
+                    at=datetime.now() + timedelta(seconds=delay),
+                    error=error,
+                )
+                await session.commit()
+            self.enqueue(job.charge_id, delay)
+            return
+
+        logger.error(
+            f"Provisioning {job.charge_id!r} failed "
+            f"after {job.attempts} attempts: {error}"
+        )
+        async with AsyncSessionLocal() as session:
+            await crud.finish(
+                session, job.charge_id, ProvisionStateEnum.failed, error
+            )
+            await session.commit()
+        await self._notify(
+            job.user_id,
+            user_msg.PROVISION_FAILED_MSG.format(charge_id=job.charge_id),
+        )
+
+    async def _notify(self, user_id: int, text: str):
+        try:
+            await self._bot.send_message(user_id, text)
+        except TelegramAPIError as e:
+            logger.warning(f"User: {user_id!r}. Notification failed: {e}")
+
+
+@cache
+def get_provisioner() -> Provisioner:
+    settings = get_settings()
+    return Provisioner(
+        settings.provisioning.workers,
+        settings.provisioning.max_attempts,
+        settings.provisioning.backoff,
+        settings.provisioning.max_backoff,
+        settings.api.inbound_id,
+    )
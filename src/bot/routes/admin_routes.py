@@ -0,0 +1,261 @@
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from aiogram import Bot, Router, types
+from aiogram.filters import Command, CommandObject
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.bot.middlewares.outgoing import get_outgoing_limiter
+from src.bot.msg import admin_msg, user_msg
+from src.bot.utils.filters import AdminFilter, ChatTypeFilter
+from src.crud.broadcast import get_broadcast_crud
+from src.crud.payment import get_payment_crud
+from src.database.database import AsyncSessionLocal, get_engine
+from src.database.pool import get_pool_stats
+from src.schemas.broadcast import BroadcastSchemaCreate
+from src.utils.broadcast import get_broadcaster
+from src.utils.settings import BroadcastStateEnum, StatusTypeEnum
+from src.utils.tariff import get_tariff_catalog
+from src.utils.tracing import get_profiler
+
+
+def get_admin_router() -> Router:
+    return admin_router
+
+
+MAX_PROFILE_NAME_LENGTH = 70
+
+admin_router = Router(name=__name__)
+admin_router.message.filter(ChatTypeFilter(["private"]), AdminFilter())
+
+
+@admin_router.message(Command("pool"))
+async def pool_stats_cmd(message: types.Message):
+    """Database pool stats command handler"""
+    logger.trace("Admin: {!r}. Pool stats handler", message.from_user.id)
+    stats = get_pool_stats(get_engine())
+    await message.answer(
+        admin_msg.POOL_STATS_MSG.format(
+            **vars(stats), wait_time_avg=stats.wait_time_avg
+        )
+    )
+
+
+@admin_router.message(Command("api"))
+async def api_stats_cmd(message: types.Message):
+    """Telegram API requests stats command handler"""
+    logger.trace("Admin: {!r}. API stats handler", message.from_user.id)
+    limiter = get_outgoing_limiter()
+    rows = [
+        admin_msg.API_STATS_ROW.format(
+            method=method,
+            **vars(stats),
+            latency_avg=stats.latency_avg,
+            wait_time_avg=stats.wait_time_avg,
+        )
+        for method, stats in sorted(limiter.stats.items())
+    ]
+    await message.answer(
+        admin_msg.API_STATS_MSG.format(
+            queue_depth=limiter.queue_depth,
+            queue_depth_max=limiter.queue_depth_max,
+            rows="\n".join([admin_msg.API_STATS_HEADER, *rows]),
+        )
+    )
+
+
+@admin_router.message(Command("revenue"))
+async def revenue_cmd(message: types.Message, command: CommandObject):
+    """Revenue from the payments ledger, for the last days if passed"""
+    logger.trace("Admin: {!r}. Revenue handler", message.from_user.id)
+    days = None
+    if command.args:
+        if not command.args.isdigit():
+            await message.answer(admin_msg.REVENUE_USAGE_MSG)
+            return
+        days = int(command.args)
+    since = datetime.now() - timedelta(days=days) if days else None
+    try:
+        async with AsyncSessionLocal() as session:
+            revenue = await get_payment_crud().get_revenue(session, since)
+    except SQLAlchemyError as e:
+        logger.error(f"Revenue query failed: {e}")
+        await message.answer(user_msg.COMMON_ERROR_MSG)
+        return
+    rows = [
+        admin_msg.REVENUE_ROW.format(
+            currency=currency, count=count, amount=amount
+        )
+        for currency, count, amount in revenue
+    ]
+    await message.answer(
+        admin_msg.REVENUE_MSG.format(
+            period=f"{days} дн\\." if days else "всё время",
+            rows="\n".join([admin_msg.REVENUE_HEADER, *rows]),
+        )
+    )
+
+
+@admin_router.message(Command("profile"))
+async def profile_cmd(message: types.Message, command: CommandObject):
+    """Event loop sampling profiler start and stop, the report
+    is the top functions and the collapsed stacks file"""
+    logger.trace("Admin: {!r}. Profile handler", message.from_user.id)
+    profiler = get_profiler()
+    if command.args == "start":
+        if profiler.is_running:
+            await message.answer(admin_msg.PROFILE_RUNNING_MSG)
+            return
+        profiler.start()
+        await message.answer(admin_msg.PROFILE_STARTED_MSG)
+        return
+    if command.args != "stop":
+        await message.answer(admin_msg.PROFILE_USAGE_MSG)
+        return
+    if not profiler.is_running:
+        await message.answer(admin_msg.PROFILE_NOT_RUNNING_MSG)
+        return
+    profiler.stop()
+    samples = max(profiler.samples, 1)
+    rows = [
+        admin_msg.PROFILE_ROW.format(
+            own=own * 100 / samples,
+            total=total * 100 / samples,
+            # no closing code block in the names
+            name=name.replace("`", "'")[:MAX_PROFILE_NAME_LENGTH],
+        )
+        for name, own, total in profiler.top()
+    ]
+    await message.answer(
+        admin_msg.PROFILE_MSG.format(
+            duration=perf_counter() - profiler.started_at,
+            samples=profiler.samples,
+            rows="\n".join([admin_msg.PROFILE_HEADER, *rows]),
+        )
+    )
+    if profiler.samples:
+        await message.answer_document(
+            types.BufferedInputFile(
+                profiler.collapsed().encode(), filename="profile.folded"
+            ),
+            caption=admin_msg.PROFILE_FILE_CAPTION,
+        )
+
+
+@admin_router.message(Command("broadcast"))
+async def broadcast_cmd(
+    message: types.Message, bot: Bot, command: CommandObject
+):
+    """Broadcast the replied message to the users"""
+    admin_id = message.from_user.id
+    logger.trace("Admin: {!r}. Broadcast handler", admin_id)
+    usage = admin_msg.BROADCAST_USAGE_MSG.format(
+        statuses=", ".join(f"`{status.name}`" for status in StatusTypeEnum)
+    )
+    if message.reply_to_message is None:
+        await message.answer(usage)
+        return
+    status = None
+    if command.args:
+        if (status := StatusTypeEnum.__members__.get(command.args)) is None:
+            await message.answer(usage)
+            return
+
+    crud = get_broadcast_crud()
+    try:
+        async with AsyncSessionLocal() as session:
+            # the running one may belong to another process
+            if (running := await crud.get_running(session)) is not None:
+                await message.answer(
+                    admin_msg.BROADCAST_RUNNING_MSG.format(id=running.id)
+                )
+                return
+            broadcast = await crud.create_with_commit(
+                session,
+                obj_in=BroadcastSchemaCreate(
+                    from_chat_id=message.chat.id,
+                    message_id=message.reply_to_message.message_id,
+                    status=status,
+                ),
+            )
+    except SQLAlchemyError as e:
+        logger.error(f"Unhandled sqlalchemy error while broadcast: {e}")
+        await message.answer(user_msg.COMMON_ERROR_MSG)
+        return
+
+    get_broadcaster().start(bot, broadcast)
+    await message.answer(
+        admin_msg.BROADCAST_STARTED_MSG.format(id=broadcast.id)
+    )
+
+
+@admin_router.message(Command("broadcast_status"))
+async def broadcast_status_cmd(message: types.Message):
+    """Running broadcast progress command handler"""
+    logger.trace("Admin: {!r}. Broadcast status", message.from_user.id)
+    try:
+        async with AsyncSessionLocal() as session:
+            broadcast = await get_broadcast_crud().get_running(session)
+    except SQLAlchemyError as e:
+        logger.error(f"Broadcast status query failed: {e}")
+        await message.answer(user_msg.COMMON_ERROR_MSG)
+        return
+    if broadcast is None:
+        await message.answer(admin_msg.NO_BROADCAST_MSG)
+        return
+    await message.answer(
+        admin_msg.BROADCAST_STATUS_MSG.format(
+            id=broadcast.id,
+            state=broadcast.state.value,
+            sent=broadcast.sent,
+            failed=broadcast.failed,
+            last_user_id=broadcast.last_user_id,
+        )
+    )
+
+
+@admin_router.message(Command("broadcast_cancel"))
+async def broadcast_cancel_cmd(message: types.Message):
+    """Cancel the running broadcast, it stops on the next checkpoint"""
+    logger.trace("Admin: {!r}. Broadcast cancel", message.from_user.id)
+    try:
+        async with AsyncSessionLocal() as session:
+            cancelled = await get_broadcast_crud().update(
+                session,
+                update_filter={"state": BroadcastStateEnum.running},
+                update_values={"state": BroadcastStateEnum.cancelled},
+            )
+            await session.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Broadcast cancel failed: {e}")
+        await message.answer(user_msg.COMMON_ERROR_MSG)
+        return
+    await message.answer(
+        admin_msg.BROADCAST_CANCELLED_MSG
+        if cancelled
+        else admin_msg.NO_BROADCAST_MSG
+    )
+
+
+@admin_router.message(Command("tariffs"))
+async def tariffs_cmd(message: types.Message):
+    """Reload the tariffs catalog after the tariffs are edited"""
+    logger.trace("Admin: {!r}. Tariffs reload handler", message.from_user.id)
+    try:
+        tariffs = await get_tariff_catalog().reload()
+    except SQLAlchemyError as e:
+        logger.error(f"Tariffs reload failed: {e}")
+        await message.answer(user_msg.COMMON_ERROR_MSG)
+        return
+    rows = [
+        admin_msg.TARIFFS_ROW.format(
+            id=tariff.id, days=tariff.days, price=tariff.price
+        )
+        for tariff in tariffs
+    ]
+    await message.answer(
+        admin_msg.TARIFFS_RELOADED_MSG.format(
+            rows="\n".join([admin_msg.TARIFFS_HEADER, *rows])
+        )
+    )
@@ -4,12 +4,26 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 from loguru import logger
 from aiogram import Router, types, F, Bot
 from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 
 from src.bot.callback.user_callback import BuyCallback
+from src.bot.middlewares.antiflood import get_antiflood_middleware
 from src.bot.msg import user_msg
+from src.bot.provisioning import (
+    get_provisioner,
+    record_payment,
+    record_purchase,
+)
 from src.bot.utils.filters import ChatTypeFilter
-from src.utils.payment import get_tariff
-from src.utils.settings import get_settings
+from src.schemas.payment import PaymentSchemaCreate
+from src.utils.payment import (
+    get_tariff,
+    get_user_payment,
+    set_payment_refunded,
+)
+from src.utils.settings import PaymentStatusEnum, get_settings
+from src.utils.subscription import get_expiry_scheduler
+from src.utils.tariff import get_tariff_catalog
 
 
 def get_payment_router() -> Router:
@@ -18,6 +32,8 @@ def get_payment_router() -> Router:
 
 payment_router = Router(name=__name__)
 payment_router.message.filter(ChatTypeFilter(["private"]))
+payment_router.message.middleware(get_antiflood_middleware("command"))
+payment_router.callback_query.middleware(get_antiflood_middleware("payment"))
 
 
 @payment_router.callback_query(BuyCallback.filter())
@@ -34,7 +50,7 @@ async def order_callback(
 
     user_id = callback.from_user.id
     tariff_id = callback_data.tariff_id
-    logger.trace(f"User: {user_id!r} choose tariff №{tariff_id}")
+    logger.trace("User: {!r} choose tariff №{}", user_id, tariff_id)
 
     tariff = await get_tariff(tariff_id)
     if tariff is None:
@@ -66,17 +82,64 @@ async def order_callback(
 async def pre_checkout_handler(pre_checkout_query: PreCheckoutQuery):
     """Payment pre checkout"""
     logger.trace(
-        f"User: {pre_checkout_query.from_user.id!r} pre checkout payment"
+        "User: {!r} pre checkout payment", pre_checkout_query.from_user.id
     )
     await pre_checkout_query.answer(ok=True)
 
 
 @payment_router.message(F.successful_payment)
 async def process_successful_payment(message: Message):
-    """Successful payment handler"""
-    logger.debug(f"User: {message.from_user.id!r} successful payment")
-    charge_id = message.successful_payment.telegram_payment_charge_id
-    tariff_id = message.successful_payment.invoice_payload.split("_")[-1]
+    """Successful payment handler.
+    Only records the purchase, the VPN client is provisioned
+    in the background.
+
+    The payment goes to the ledger first, whatever the tariff is.
+    Database errors are raised, so the stored update is retried"""
+    user_id = message.from_user.id
+    logger.debug("User: {!r} successful payment", user_id)
+    successful_payment = message.successful_payment
+    charge_id = successful_payment.telegram_payment_charge_id
+    payload = successful_payment.invoice_payload
+
+    try:
+        await record_payment(
+            PaymentSchemaCreate(
+                charge_id=charge_id,
+                provider_charge_id=(
+                    successful_payment.provider_payment_charge_id
+                ),
+                user_id=user_id,
+                payload=payload,
+                amount=successful_payment.total_amount,
+                currency=successful_payment.currency,
+            )
+        )
+        tariff_id = payload.split("_")[-1]
+        tariff = (
+            await get_tariff_catalog().get(int(tariff_id))
+            if tariff_id.isdigit()
+            else None
+        )
+        if tariff is None:
+            # recorded, can be refunded
+            logger.error(
+                f"Payment {charge_id!r} of unknown tariff {payload!r}"
+            )
+            await message.answer(user_msg.COMMON_ERROR_MSG)
+            return
+        subscription = await record_purchase(charge_id, user_id, tariff)
+    except SQLAlchemyError as e:
+        logger.error(f"Payment {charge_id!r} recording failed: {e}")
+        await message.answer(user_msg.COMMON_ERROR_MSG)
+        raise
+    if subscription is None:
+        logger.warning(f"Payment {charge_id!r} is already recorded")
+        return
+
+    get_expiry_scheduler().schedule(
+        subscription.id, user_id, subscription.expire_datetime
+    )
+    get_provisioner().enqueue(charge_id)
     await message.answer(
         user_msg.SUCCESS_PAY_MSG.format(charge_id=charge_id),
         # TODO уточнить список возможных идентификаторов
@@ -91,19 +154,44 @@ async def command_refund_handler(
     """Test transaction refund command handler"""
 
     async def refund():
+        if not transaction_id:
+            await message.answer(user_msg.NO_TRANSACTION_ID_MSG)
+            return
+        try:
+            payment = await get_user_payment(user_id, transaction_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Transaction {transaction_id!r} lookup failed: {e}")
+            await message.answer(user_msg.COMMON_ERROR_MSG)
+            return
+        if payment is None:
+            await message.answer(user_msg.NO_PAYMENT_MSG)
+            return
+        if payment.status == PaymentStatusEnum.refunded:
+            await message.answer(user_msg.ALREADY_REFUNDED_MSG)
+            return
+
         try:
             await bot.refund_star_payment(
                 user_id=user_id, telegram_payment_charge_id=transaction_id
             )
         except ValidationError:
             await message.answer(user_msg.NO_TRANSACTION_ID_MSG)
+            return
         except Exception as e:
             logger.error(f"Transaction {transaction_id!r} refund failed: {e}")
             await message.answer(user_msg.COMMON_ERROR_MSG)
+            return
+        try:
+            await set_payment_refunded(transaction_id)
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Transaction {transaction_id!r} is refunded, "
+                f"but the ledger isn't updated: {e}"
+            )
 
     user_id = message.from_user.id
     transaction_id = command.args
-    logger.debug(f"User {user_id!r} refund transaction {transaction_id!r}")
+    logger.debug("User {!r} refund transaction {!r}", user_id, transaction_id)
     if get_settings().pay.debug:
         await refund()
     else:
@@ -1,13 +1,31 @@
 from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
 
 from aiogram import Router, types, F
 from aiogram.filters import CommandStart
 
 from src.bot.callback.user_callback import ButtonCallback
 from src.bot.kb import user_kb
-from src.bot.msg.user_msg import START_USER, MAIN_MENU_MSG, SUB_MENU_MSG
+from src.bot.middlewares.antiflood import get_antiflood_middleware
+from src.bot.msg.user_msg import (
+    START_USER,
+    MAIN_MENU_MSG,
+    SUB_MENU_MSG,
+    USER_STATUS,
+    LINK_MSG,
+    NO_LINK_MSG,
+    COMMON_ERROR_MSG,
+)
 from src.bot.utils.filters import ChatTypeFilter
-from src.utils.user import add_user
+from src.utils.settings import StatusTypeEnum
+from src.utils.user import add_user, get_user
+
+# statuses with an active VPN access
+_LINK_STATUSES = (
+    StatusTypeEnum.trial,
+    StatusTypeEnum.free,
+    StatusTypeEnum.paid,
+)
 
 
 def get_user_router() -> Router:
@@ -16,13 +34,15 @@ def get_user_router() -> Router:
 
 user_router = Router(name=__name__)
 user_router.message.filter(ChatTypeFilter(["private"]))
+user_router.message.middleware(get_antiflood_middleware("command"))
+user_router.callback_query.middleware(get_antiflood_middleware("callback"))
 
 
 @user_router.message(CommandStart())
 async def start_cmd(message: types.Message):
     """Start command handler"""
     user_id = message.from_user.id
-    logger.trace(f"User: {user_id!r}. Command start handler")
+    logger.trace("User: {!r}. Command start handler", user_id)
     await add_user(user_id)
     text = START_USER.format(id=user_id)
     await message.answer(text=text, reply_markup=user_kb.main_menu_inkb())
@@ -32,18 +52,41 @@ async def start_cmd(message: types.Message):
 async def main_menu(callback: types.CallbackQuery):
     """Main menu handler"""
     user_id = callback.from_user.id
-    logger.trace(f"User: {user_id!r}. Main menu handler")
+    logger.trace("User: {!r}. Main menu handler", user_id)
+    user = await get_user(user_id)
+    status = user.status if user is not None else StatusTypeEnum.new
     await callback.message.edit_text(
-        text=MAIN_MENU_MSG.format(id=user_id),
+        text=MAIN_MENU_MSG.format(
+            id=user_id, status=USER_STATUS[status.value]
+        ),
         reply_markup=user_kb.main_menu_inkb(),
     )
 
 
+@user_router.callback_query(ButtonCallback.filter(F.button == "link"))
+async def get_link(callback: types.CallbackQuery):
+    """VPN link handler"""
+    user_id = callback.from_user.id
+    logger.trace("User: {!r}. Get link handler", user_id)
+    user = await get_user(user_id)
+    if user is not None and user.link and user.status in _LINK_STATUSES:
+        text = LINK_MSG.format(link=user.link)
+    else:
+        text = NO_LINK_MSG
+    await callback.message.edit_text(
+        text=text, reply_markup=user_kb.link_menu_inkb()
+    )
+
+
 @user_router.callback_query(ButtonCallback.filter(F.button == "buymenu"))
 async def menu_sub(callback: types.CallbackQuery):
     """Subscription menu handler"""
     user_id = callback.from_user.id
-    logger.trace(f"User: {user_id!r}. Main buy handler")
-    await callback.message.edit_text(
-        text=SUB_MENU_MSG, reply_markup=await user_kb.get_sub_menu()
-    )
+    logger.trace("User: {!r}. Main buy handler", user_id)
+    try:
+        sub_menu = await user_kb.get_sub_menu()
+    except SQLAlchemyError as e:
+        logger.error(f"Unhandled sqlalchemy error while get tariffs: {e}")
+        await callback.message.answer(COMMON_ERROR_MSG)
+        return
+    await callback.message.edit_text(text=SUB_MENU_MSG, reply_markup=sub_menu)
@@ -0,0 +1,252 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+from multiprocessing.context import SpawnProcess
+from time import monotonic
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.bot.ingestion import (
+    PgUpdateStore,
+    get_update_store,
+    handle_stored_update,
+)
+from src.bot.utils.updates import KeyedSerializer, get_update_user_id
+from src.utils.settings import get_settings
+
+_STOP = None
+
+
+class ShardPool:
+    """N worker processes, every worker owns a part of the users.
+    A dead worker is restarted with the same queue, a crashing one
+    with the delay doubling up to the max"""
+
+    # seconds between the workers liveness checks
+    _SUPERVISE_INTERVAL = 1.0
+    # restart delay of the second crash in a row, seconds
+    _RESTART_DELAY = 1.0
+    # the crashes count is reset after a worker lives that long
+    _RESTART_DELAY_MAX = 60.0
+
+    def __init__(self, workers: int, queue_size: int):
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = [
+            self._context.Queue(maxsize=queue_size) for _ in range(workers)
+        ]
+        self._processes: list[SpawnProcess] = []
+        self._started_at = [0.0] * workers
+        # crashes in a row and the planned restart time by the shard
+        self._crashes = [0] * workers
+        self._restart_at: list[float | None] = [None] * workers
+        self._supervisor: asyncio.Task | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self._queues)
+
+    def _spawn(self, index: int) -> SpawnProcess:
+        process = self._context.Process(
+            target=run_shard_worker,
+            args=(index, self._queues[index]),
+            name=f"pushka-shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._started_at[index] = monotonic()
+        return process
+
+    def _restart_delay(self, index: int) -> float:
+        if (crashes := self._crashes[index]) == 0:
+            return 0.0
+        return min(
+            self._RESTART_DELAY * 2 ** (crashes - 1), self._RESTART_DELAY_MAX
+        )
+
+    def start(self):
+        self._processes = [self._spawn(index) for index in range(self.size)]
+        self._supervisor = asyncio.create_task(self._supervise())
+        logger.info(f"Started {self.size} shard workers")
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(self._SUPERVISE_INTERVAL)
+            now = monotonic()
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    lived = now - self._started_at[index]
+                    if lived >= self._RESTART_DELAY_MAX:
+                        self._crashes[index] = 0
+                    continue
+                if self._restart_at[index] is None:
+                    delay = self._restart_delay(index)
+                    self._crashes[index] += 1
+                    self._restart_at[index] = now + delay
+                    logger.error(
+                        f"Shard {process.name!r} exited with code "
+                        f"{process.exitcode}, restart in {delay:.1f} s"
+                    )
+                if now < self._restart_at[index]:
+                    continue
+                self._restart_at[index] = None
+                process.close()
+                self._processes[index] = self._spawn(index)
+
+    def shard_of(self, update: Update) -> int:
+        user_id = get_update_user_id(update)
+        key = user_id if user_id is not None else update.update_id
+        return key % self.size
+
+    async def submit(self, update: Update):
+        shard_queue = self._queues[self.shard_of(update)]
+        raw = update.model_dump_json(exclude_unset=True)
+        try:
+            shard_queue.put_nowait(raw)
+        except queue.Full:
+            # backpressure: wait for the worker without blocking the loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, shard_queue.put, raw
+            )
+
+    async def stop(self, timeout: float = 30):
+        """Workers handle the queued updates and exit,
+        the ones still running after the timeout are killed"""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            await asyncio.gather(self._supervisor, return_exceptions=True)
+        deadline = monotonic() + timeout
+        loop = asyncio.get_running_loop()
+
+        async def send_stop(shard_queue: multiprocessing.Queue):
+            # a full queue of a stuck or dead worker doesn't block the loop
+            try:
+                await loop.run_in_executor(
+                    None, shard_queue.put, _STOP, True, timeout
+                )
+            except queue.Full:
+                pass
+
+        await asyncio.gather(*(send_stop(q) for q in self._queues))
+        for process in self._processes:
+            await loop.run_in_executor(
+                None, process.join, max(deadline - monotonic(), 0)
+            )
+            if process.is_alive():
+                logger.warning(f"Shard {process.name!r} killed by timeout")
+                process.kill()
+        self._processes.clear()
+        logger.info("Shard workers stopped")
+
+
+class ShardedDispatcher(Dispatcher):
+    """Front dispatcher: has no handlers, just routes every update
+    to the worker process which owns the update user.
+
+    With a store the update is saved before routing and acked
+    by the worker, the saved not handled ones are routed on startup"""
+
+    def __init__(
+        self,
+        pool: ShardPool,
+        store: PgUpdateStore | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self._pool = pool
+        self._store = store
+        self.shutdown.register(self._on_shutdown)
+
+    async def emit_startup(self, *args: Any, **kwargs: Any) -> None:
+        # after the bot startup hooks: logger and tables are ready
+        await super().emit_startup(*args, **kwargs)
+        await self._on_startup(kwargs["bot"])
+
+    async def _on_startup(self, bot: Bot):
+        self._pool.start()
+        if self._store is None:
+            return
+        replayed = 0
+        try:
+            async for update in self._store.pending(bot):
+                await self._pool.submit(update)
+                replayed += 1
+        except SQLAlchemyError as e:
+            logger.error(f"Pending updates replay failed: {e}")
+        if replayed:
+            logger.info(f"Pending updates replayed: {replayed}")
+
+    async def _on_shutdown(self):
+        await self._pool.stop()
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any):
+        if self._store is not None:
+            try:
+                if not await self._store.save(update):
+                    # saved before the restart, routed on startup
+                    return
+            except SQLAlchemyError as e:
+                logger.error(f"Update {update.update_id} save failed: {e}")
+        await self._pool.submit(update)
+
+
+async def consume_shard_queue(
+    bot: Bot, dp: Dispatcher, shard_queue: multiprocessing.Queue
+):
+    """Handle updates from the front process.
+    Updates of one user are handled in the receive order"""
+    loop = asyncio.get_running_loop()
+    store = get_update_store()
+    serializer = KeyedSerializer()
+    settings = get_settings().bot
+    slots = asyncio.Semaphore(settings.worker_concurrency)
+    # read but not handled updates, the rest wait in the shard queue
+    backlog = asyncio.Semaphore(settings.shard_queue_size)
+    tasks: set[asyncio.Task] = set()
+
+    async def handle(update: Update):
+        # the slot is taken in the user chain, a flooding user's
+        # queued updates don't hold the slots of the others
+        async with slots:
+            await handle_stored_update(
+                store, update, dp.feed_update(bot, update)
+            )
+
+    while True:
+        await backlog.acquire()
+        raw = await loop.run_in_executor(None, shard_queue.get)
+        if raw is _STOP:
+            break
+        update = Update.model_validate_json(raw, context={"bot": bot})
+        user_id = get_update_user_id(update)
+        task = serializer.submit(
+            user_id if user_id is not None else update.update_id,
+            handle(update),
+        )
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _: backlog.release())
+
+    if tasks:
+        await asyncio.wait(tasks)
+    if store is not None:
+        await store.close()
+
+
+def run_shard_worker(index: int, shard_queue: multiprocessing.Queue):
+    """Worker process entrypoint: own event loop, dispatcher and db pool"""
+    # the front process stops workers through the queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from src.bot import PushkaVpnBot
+
+    logger.info(f"Shard worker #{index} started")
+    asyncio.run(
+        PushkaVpnBot(shard_worker=True, shard_index=index).run_shard_worker(
+            shard_queue
+        )
+    )
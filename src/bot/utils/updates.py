@@ -0,0 +1,48 @@
+import asyncio
+from collections.abc import Awaitable, Hashable
+from typing import Any
+
+from aiogram.types import Update
+
+
+def get_update_user_id(update: Update) -> int | None:
+    """Telegram user (or chat) the update belongs to"""
+    try:
+        event = update.event
+    except Exception:
+        return None
+
+    if (user := getattr(event, "from_user", None)) is not None:
+        return user.id
+    if (chat := getattr(event, "chat", None)) is not None:
+        return chat.id
+    return None
+
+
+class KeyedSerializer:
+    """Runs coroutines concurrently, but one after another
+    for the same key (f.e. updates of one user keep their order)"""
+
+    def __init__(self):
+        self._tails: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self):
+        return len(self._tails)
+
+    def submit(self, key: Hashable, coro: Awaitable[Any]) -> asyncio.Task:
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run(key, previous, coro))
+        self._tails[key] = task
+        return task
+
+    async def _run(
+        self, key: Hashable, previous: asyncio.Task | None, coro: Awaitable
+    ) -> Any:
+        try:
+            if previous is not None:
+                # exceptions of the previous task are not ours
+                await asyncio.wait([previous])
+            return await coro
+        finally:
+            if self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
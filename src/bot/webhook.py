@@ -0,0 +1,53 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import (
+    SimpleRequestHandler,
+    setup_application,
+)
+from aiohttp import web
+from loguru import logger
+
+from src.utils.settings import get_settings
+
+
+async def health_handler(_: web.Request) -> web.Response:
+    """Load balancer health check"""
+    return web.Response(text="ok")
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """aiohttp application with the webhook route.
+
+    Telegram gets 200 after the dispatcher queued the update,
+    a full queue delays the response (backpressure)"""
+    settings = get_settings().bot
+    app = web.Application()
+    app.router.add_get("/health", health_handler)
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=False,
+        secret_token=settings.webhook_secret,
+    ).register(app, path=settings.webhook_path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook_server(bot: Bot, dp: Dispatcher):
+    """Serve the webhook until the task is cancelled"""
+    settings = get_settings().bot
+    runner = web.AppRunner(create_webhook_app(bot, dp))
+    await runner.setup()
+    site = web.TCPSite(
+        runner, host=settings.webhook_host, port=settings.webhook_port
+    )
+    await site.start()
+    logger.info(
+        f"Webhook server started on "
+        f"{settings.webhook_host}:{settings.webhook_port}"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,50 @@
+from functools import cache
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.common import CRUDBase
+from src.models.broadcast import Broadcast
+from src.schemas.broadcast import BroadcastSchema, BroadcastSchemaCreate
+from src.utils.settings import BroadcastStateEnum
+
+
+class BroadcastCrud(
+    CRUDBase[Broadcast, BroadcastSchema, BroadcastSchemaCreate]
+):
+    async def get_running(self, session: AsyncSession) -> Broadcast | None:
+        broadcasts = await self.get_multi_raw(
+            session, limit=1, state=BroadcastStateEnum.running
+        )
+        return broadcasts[0] if broadcasts else None
+
+    async def save_progress(
+        self,
+        session: AsyncSession,
+        broadcast_id: int,
+        *,
+        last_user_id: int | None,
+        sent: int,
+        failed: int,
+        state: BroadcastStateEnum = BroadcastStateEnum.running,
+    ) -> bool:
+        """Save the checkpoint of a running broadcast.
+        Returns False if the broadcast isn't running anymore"""
+        updated = await self.update(
+            session,
+            update_filter={
+                "id": broadcast_id,
+                "state": BroadcastStateEnum.running,
+            },
+            update_values={
+                "last_user_id": last_user_id,
+                "sent": sent,
+                "failed": failed,
+                "state": state,
+            },
+        )
+        return updated > 0
+
+
+@cache
+def get_broadcast_crud() -> BroadcastCrud:
+    return BroadcastCrud(Broadcast)
@@ -1,18 +1,32 @@
-from collections.abc import Iterable
-from functools import wraps
-from typing import TypeVar, Generic, TypeAlias, Callable, Awaitable
+import inspect
+from collections.abc import AsyncIterator, Iterable, Sequence
+from enum import Enum
+from functools import cached_property, wraps
+from operator import attrgetter
+from typing import (
+    TypeVar,
+    Generic,
+    TypeAlias,
+    Callable,
+    Awaitable,
+    get_args,
+    get_origin,
+)
 
 import loguru
 from pydantic import BaseModel
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete, update, values, column, bindparam
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.engine.cursor import CursorResult
-from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import QueryableAttribute
 from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import OperatorExpression, UnaryExpression
 
 from src.database.database import Base
+from src.utils.common import chunked
 from src.utils.settings import Settings, get_settings
+from src.utils.tracing import traced
 
 # not py 3.12 with [t] :(
 ModelType = TypeVar("ModelType", bound=Base)
@@ -32,18 +46,69 @@ CRUDBaseCommonMethodType: TypeAlias = (
 class NoResultFoundEx(Exception): ...
 
 
-def map_to_schema_result(func) -> ():
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        result = await func(*args, **kwargs)
-        self: CRUDBase = args[0]
+class SchemaMapper:
+    """ORM object -> schema converter, built once per CRUD object.
+
+    Loaded column values are read from the instance `__dict__`
+    instead of the instrumented attributes"""
+
+    def __init__(self, schema: type[GetSchemaType]):
+        self.schema = schema
+        self._fields = tuple(schema.model_fields)
+        self._fields_getter = attrgetter(*self._fields)
+        self._validate = schema.__pydantic_validator__.validate_python
+
+    def _values(self, obj: ModelType) -> dict[str, ...]:
+        state = obj.__dict__
+        try:
+            return {field: state[field] for field in self._fields}
+        except KeyError:
+            # expired, deferred or not a column attribute
+            values_ = self._fields_getter(obj)
+            if len(self._fields) == 1:
+                values_ = (values_,)
+            return dict(zip(self._fields, values_))
+
+    def one(self, obj: ModelType) -> GetSchemaType:
+        return self._validate(self._values(obj))
+
+    def many(self, objs: Iterable[ModelType]) -> list[GetSchemaType]:
+        validate, values = self._validate, self._values
+        return [validate(values(obj)) for obj in objs]
+
+
+class LazySchemaList(Sequence):
+    """Converts ORM objects to schemas on the first access to each item"""
+
+    def __init__(self, objs: Sequence[ModelType], mapper: SchemaMapper):
+        self._objs = objs
+        self._mapper = mapper
+        self._schemas: list[GetSchemaType | None] = [None] * len(objs)
+
+    def __len__(self) -> int:
+        return len(self._objs)
 
-        # just a crazy hack for grabbing a generic class
-        get_schema: GetSchemaType = self.__orig_bases__[0].__args__[1]
+    def _get(self, index: int) -> GetSchemaType:
+        if (schema := self._schemas[index]) is None:
+            schema = self._schemas[index] = self._mapper.one(self._objs[index])
+        return schema
 
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(len(self))[index]]
+        return self._get(range(len(self))[index])
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} items)"
+
+
+def map_to_schema_result(func) -> ():
+    @wraps(func)
+    async def wrapper(self: "CRUDBase", *args, **kwargs):
+        result = await func(self, *args, **kwargs)
         if isinstance(result, Iterable):
-            return [get_schema.model_validate(res) for res in result]
-        return get_schema.model_validate(result)
+            return self.schema_mapper.many(result)
+        return self.schema_mapper.one(result)
 
     return wrapper
 
@@ -54,6 +119,13 @@ UpdateFilter: TypeAlias = (
 
 
 class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
+    # COPY is cheap per row, so it takes bigger chunks than INSERT
+    _COPY_CHUNK_FACTOR = 10
+    # max pre-built statements (filter shapes) per CRUD object
+    _STATEMENT_CACHE_SIZE = 256
+
+    get_schema: type[GetSchemaType]
+
     def __init__(self, model: type[ModelType], settings: Settings = None):
         """
         CRUD object with default methods to
@@ -64,6 +136,36 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
         """
         self._settings = settings or get_settings()
         self._model = model
+        self._schema_mapper = SchemaMapper(self.get_schema)
+        self._statement_cache: dict[tuple, Select] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # resolve the generic schema argument once per subclass
+        for base in cls.__dict__.get("__orig_bases__", ()):
+            if get_origin(base) is CRUDBase:
+                cls.get_schema = get_args(base)[1]
+        cls._trace_methods()
+
+    @classmethod
+    def _trace_methods(cls):
+        """Run the public coroutine methods in the update trace spans
+        named `CrudClass.method`"""
+        seen = set()
+        for klass in cls.__mro__:
+            for name, method in vars(klass).items():
+                if name in seen or name.startswith("_"):
+                    continue
+                seen.add(name)
+                if not inspect.iscoroutinefunction(method):
+                    continue
+                # a method traced by a parent CRUD class
+                method = getattr(method, "__traced__", method)
+                setattr(cls, name, traced(f"{cls.__name__}.{name}")(method))
+
+    @property
+    def schema_mapper(self) -> SchemaMapper:
+        return self._schema_mapper
 
     @property
     def model(self):
@@ -81,9 +183,55 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
         """can be used for config options with inload"""
         return select(self._model)
 
-    @property
+    @cached_property
     def _has_custom_base(self):
-        return self._select_model != select(self._model)
+        return not self._select_model.compare(select(self._model))
+
+    def _cached_select(
+        self,
+        filter_dict: dict[str, ...],
+        offset: bool = False,
+        limit: bool = False,
+        order_by: QueryableAttribute | None = None,
+    ) -> tuple[Select, dict[str, ...]]:
+        """Pre-built select with bind parameters for the filter shape,
+        the same statement object makes sqlalchemy compiled cache
+        and asyncpg prepared statements cache hits cheap"""
+        shape = (
+            tuple(
+                (field, value is None) for field, value in filter_dict.items()
+            ),
+            offset,
+            limit,
+            order_by,
+        )
+        if (stmt := self._statement_cache.get(shape)) is None:
+            stmt = self._select_model.where(
+                *[
+                    (
+                        getattr(self._model, field).is_(None)
+                        if value_is_none
+                        else getattr(self._model, field)
+                        == bindparam(f"filter_{field}")
+                    )
+                    for field, value_is_none in shape[0]
+                ]
+            )
+            if offset:
+                stmt = stmt.offset(bindparam("offset"))
+            if limit:
+                stmt = stmt.limit(bindparam("limit"))
+            if order_by is not None:
+                stmt = stmt.order_by(order_by)
+            if len(self._statement_cache) < self._STATEMENT_CACHE_SIZE:
+                self._statement_cache[shape] = stmt
+
+        params = {
+            f"filter_{field}": value
+            for field, value in filter_dict.items()
+            if value is not None
+        }
+        return stmt, params
 
     def _resolve_filter(
         self, filter_: UpdateFilter
@@ -118,6 +266,21 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
         operator_expressions: list[OperatorExpression] | None = None,
         **filter_dict: ...,
     ) -> list[ModelType]:
+        if operator_expressions is None and (
+            order_by is None or isinstance(order_by, QueryableAttribute)
+        ):
+            stmt, params = self._cached_select(
+                filter_dict,
+                offset=bool(offset),
+                limit=limit is not None,
+                order_by=order_by,
+            )
+            if offset:
+                params["offset"] = offset
+            if limit is not None:
+                params["limit"] = limit
+            return (await session.execute(stmt, params)).scalars().all()
+
         stmt = self._select_model.where(
             *self._resolve_operator_expressions(
                 operator_expressions, **filter_dict
@@ -150,12 +313,134 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
             **filter_dict,
         )
 
+    async def get_multi_lazy(
+        self,
+        session: AsyncSession,
+        offset: int = 0,
+        limit: int | None = None,
+        order_by: UnaryExpression | None = None,
+        operator_expressions: list[OperatorExpression] | None = None,
+        **filter_dict: ...,
+    ) -> LazySchemaList:
+        """`get_multi` which converts rows to schemas only on access"""
+        objs = await self.get_multi_raw(
+            session=session,
+            offset=offset,
+            limit=limit,
+            order_by=order_by,
+            operator_expressions=operator_expressions,
+            **filter_dict,
+        )
+        return LazySchemaList(objs, self._schema_mapper)
+
+    def _key_column(
+        self, key: QueryableAttribute | None = None
+    ) -> QueryableAttribute:
+        return key or getattr(self._model, self._primary_key_names[0])
+
+    async def get_page_raw(
+        self,
+        session: AsyncSession,
+        *,
+        limit: int,
+        after: ... = None,
+        key: QueryableAttribute | None = None,
+        descending: bool = False,
+        operator_expressions: list[OperatorExpression] | None = None,
+        **filter_dict: ...,
+    ) -> list[ModelType]:
+        """Keyset (seek) pagination: `limit` rows ordered by a unique
+        indexed `key` (primary key by default) which go after the `after`
+        key value. Pass the last row key as `after` to get the next page,
+        the cost doesn't depend on the page number"""
+        key = self._key_column(key)
+        stmt = self._select_model.where(
+            *self._resolve_operator_expressions(
+                operator_expressions, **filter_dict
+            )
+        )
+        if after is not None:
+            stmt = stmt.where(key < after if descending else key > after)
+        stmt = stmt.order_by(key.desc() if descending else key).limit(limit)
+        return (await session.execute(stmt)).scalars().all()
+
+    @map_to_schema_result
+    async def get_page(
+        self,
+        session: AsyncSession,
+        *,
+        limit: int,
+        after: ... = None,
+        key: QueryableAttribute | None = None,
+        descending: bool = False,
+        operator_expressions: list[OperatorExpression] | None = None,
+        **filter_dict: ...,
+    ) -> list[GetSchemaType]:
+        return await self.get_page_raw(
+            session,
+            limit=limit,
+            after=after,
+            key=key,
+            descending=descending,
+            operator_expressions=operator_expressions,
+            **filter_dict,
+        )
+
+    async def stream_raw(
+        self,
+        session: AsyncSession,
+        *,
+        batch_size: int | None = None,
+        order_by: UnaryExpression | None = None,
+        operator_expressions: list[OperatorExpression] | None = None,
+        **filter_dict: ...,
+    ) -> AsyncIterator[ModelType]:
+        """Iterate over all the matched rows through a server side cursor,
+        only `batch_size` rows are fetched into memory at once"""
+        stmt = self._select_model.where(
+            *self._resolve_operator_expressions(
+                operator_expressions, **filter_dict
+            )
+        )
+        if order_by is not None:
+            stmt = stmt.order_by(order_by)
+        stmt = stmt.execution_options(
+            yield_per=batch_size or self._settings.db.stream_batch_size
+        )
+        result = await session.stream_scalars(stmt)
+        async for db_obj in result:
+            yield db_obj
+
+    async def stream(
+        self,
+        session: AsyncSession,
+        *,
+        batch_size: int | None = None,
+        order_by: UnaryExpression | None = None,
+        operator_expressions: list[OperatorExpression] | None = None,
+        **filter_dict: ...,
+    ) -> AsyncIterator[GetSchemaType]:
+        """`stream_raw` with rows mapped to schemas"""
+        one = self._schema_mapper.one
+        async for db_obj in self.stream_raw(
+            session,
+            batch_size=batch_size,
+            order_by=order_by,
+            operator_expressions=operator_expressions,
+            **filter_dict,
+        ):
+            yield one(db_obj)
+
     async def get_one_raw(
         self,
         session: AsyncSession,
         operator_expressions: list[OperatorExpression] | None = None,
         **filter_dict: ...,
     ) -> ModelType:
+        if operator_expressions is None:
+            stmt, params = self._cached_select(filter_dict)
+            return (await session.execute(stmt, params)).scalars().one()
+
         stmt = self._select_model.where(
             *self._resolve_operator_expressions(
                 operator_expressions, **filter_dict
@@ -209,6 +494,25 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
         res = await self.get_one_raw(session, id=db_obj.id)
         return res
 
+    async def create_or_ignore(
+        self,
+        session: AsyncSession,
+        *,
+        obj_in: dict | CreateSchemaType,
+        index_elements: list[str] | None = None,
+    ) -> bool:
+        """INSERT ... ON CONFLICT DO NOTHING in a single round-trip,
+        returns False if the object already exists"""
+        if isinstance(obj_in, BaseModel):
+            obj_in = obj_in.model_dump()
+        stmt = (
+            insert(self._model)
+            .values(**obj_in)
+            .on_conflict_do_nothing(index_elements=index_elements)
+        )
+        result: CursorResult = await session.execute(stmt)
+        return bool(result.rowcount)
+
     async def update(
         self,
         session: AsyncSession,
@@ -233,36 +537,161 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
         result: CursorResult = await session.execute(update_stmt)
         return result.rowcount
 
+    @property
+    def _primary_key_names(self) -> list[str]:
+        return [column.name for column in self._model.__table__.primary_key]
+
+    def _upsert_stmt(
+        self,
+        values: list[dict[str, ...]],
+        index_elements: list[str] | None = None,
+        update_fields: list[str] | None = None,
+    ):
+        index_elements = index_elements or self._primary_key_names
+        if update_fields is None:
+            update_fields = [
+                field for field in values[0] if field not in index_elements
+            ]
+        stmt = insert(self._model).values(values)
+        # a no-op update of a conflict column still returns the row
+        set_fields = update_fields or index_elements[:1]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={field: stmt.excluded[field] for field in set_fields},
+        )
+        return stmt.returning(self._model).execution_options(
+            populate_existing=True
+        )
+
+    @staticmethod
+    def _last_by_key(
+        values: list[dict[str, ...]], index_elements: list[str]
+    ) -> list[dict[str, ...]]:
+        """One row per conflict key, the last one wins: a statement
+        can't update the same row twice"""
+        rows = {}
+        for row in values:
+            try:
+                key = tuple(row[field] for field in index_elements)
+            except KeyError:
+                # generated by the database, conflicts with nothing
+                key = object()
+            rows[key] = row
+        return list(rows.values())
+
+    async def upsert_many(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | CreateSchemaType],
+        index_elements: list[str] | None = None,
+        update_fields: list[str] | None = None,
+    ) -> list[ModelType]:
+        """INSERT ... ON CONFLICT (index_elements) DO UPDATE ... RETURNING
+        in a single round-trip. Of the objects with the same conflict
+        target values the last one is upserted.
+        **Parameters**
+        * `index_elements`: conflict target columns, primary key if None
+        * `update_fields`: columns to update on conflict,
+            all the passed ones except the conflict target if None
+        """
+        if not objs_in:
+            return []
+        values = self._last_by_key(
+            [
+                obj.model_dump() if isinstance(obj, BaseModel) else obj
+                for obj in objs_in
+            ],
+            index_elements or self._primary_key_names,
+        )
+        stmt = self._upsert_stmt(values, index_elements, update_fields)
+        db_objs = (await session.scalars(stmt)).all()
+        if not self._has_custom_base:
+            return db_objs
+        primary_key_name = self._primary_key_names[0]
+        primary_key = getattr(self._model, primary_key_name)
+        return await self.get_multi_raw(
+            session,
+            operator_expressions=[
+                primary_key.in_(
+                    [getattr(db_obj, primary_key_name) for db_obj in db_objs]
+                )
+            ],
+        )
+
+    async def upsert(
+        self,
+        session: AsyncSession,
+        *,
+        obj_in: dict | CreateSchemaType,
+        index_elements: list[str] | None = None,
+        update_fields: list[str] | None = None,
+    ) -> ModelType:
+        """Single row `upsert_many`"""
+        db_objs = await self.upsert_many(
+            session,
+            objs_in=[obj_in],
+            index_elements=index_elements,
+            update_fields=update_fields,
+        )
+        return db_objs[0]
+
+    @map_to_schema_result
+    async def upsert_with_commit(
+        self,
+        session: AsyncSession,
+        *,
+        obj_in: dict | CreateSchemaType,
+        index_elements: list[str] | None = None,
+        update_fields: list[str] | None = None,
+    ) -> GetSchemaType:
+        db_obj = await self.upsert(
+            session,
+            obj_in=obj_in,
+            index_elements=index_elements,
+            update_fields=update_fields,
+        )
+        # detached objects are not expired by commit - no refresh query
+        session.expunge(db_obj)
+        await session.commit()
+        return db_obj
+
+    @map_to_schema_result
+    async def upsert_many_with_commit(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | CreateSchemaType],
+        index_elements: list[str] | None = None,
+        update_fields: list[str] | None = None,
+    ) -> list[GetSchemaType]:
+        db_objs = await self.upsert_many(
+            session,
+            objs_in=objs_in,
+            index_elements=index_elements,
+            update_fields=update_fields,
+        )
+        for db_obj in db_objs:
+            session.expunge(db_obj)
+        await session.commit()
+        return db_objs
+
     async def upsert_an_obj(
         self,
         session,
         filter_fields: list[str],
         obj_in: dict | CreateSchemaType,
     ) -> ModelType:
+        """`upsert` by the filter fields, they must be a unique index.
+        None values of a schema are not written"""
         if isinstance(obj_in, BaseModel):
             obj_in = obj_in.model_dump(exclude_none=True)
-        filter_dict = {k: v for k, v in obj_in.items() if k in filter_fields}
-        if not filter_dict:
+        if not any(field in obj_in for field in filter_fields):
             loguru.logger.warning("Got empty filter dict - force insert")
             return await self.create(session, obj_in=obj_in)
-        else:
-            try:
-                upd_count = await self.update(
-                    session, update_filter=filter_dict, update_values=obj_in
-                )
-                if not upd_count:
-                    raise NoResultFound()
-                if upd_count > 1:
-                    raise ValueError(
-                        "Several objects have been updated"
-                        " although one was expected"
-                    )
-                await session.flush()
-                return await self.get_one_raw(
-                    session, **(filter_dict | obj_in)
-                )
-            except NoResultFound:
-                return await self.create(session, obj_in=obj_in)
+        return await self.upsert(
+            session, obj_in=obj_in, index_elements=filter_fields
+        )
 
     async def delete(
         self,
@@ -281,3 +710,162 @@ class CRUDBase(Generic[ModelType, GetSchemaType, CreateSchemaType]):
         result: CursorResult = await session.execute(stmt)
         await session.flush()
         return result.rowcount
+
+    @staticmethod
+    def _dump_objs(objs_in: list[dict | CreateSchemaType]) -> list[dict]:
+        return [
+            obj.model_dump() if isinstance(obj, BaseModel) else obj
+            for obj in objs_in
+        ]
+
+    def _chunk_size(self, chunk_size: int | None) -> int:
+        return chunk_size or self._settings.db.bulk_chunk_size
+
+    async def create_many(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | CreateSchemaType],
+        returning: bool = True,
+        chunk_size: int | None = None,
+    ) -> list[ModelType] | int:
+        """Batched INSERT: one round-trip per chunk instead of per object.
+        With returning=False returns inserted rows count and switches
+        to COPY for batches bigger than `db.copy_threshold`"""
+        rows = self._dump_objs(objs_in)
+        if not returning:
+            if len(rows) >= self._settings.db.copy_threshold:
+                return await self.copy_many(
+                    session, objs_in=rows, chunk_size=chunk_size
+                )
+            for chunk in chunked(rows, self._chunk_size(chunk_size)):
+                await session.execute(insert(self._model), chunk)
+            return len(rows)
+
+        db_objs = []
+        stmt = insert(self._model).returning(self._model)
+        for chunk in chunked(rows, self._chunk_size(chunk_size)):
+            db_objs.extend((await session.scalars(stmt, chunk)).all())
+        return db_objs
+
+    def _copy_record(self, row: dict[str, ...], columns: list) -> tuple:
+        record = []
+        for table_column in columns:
+            if table_column.name in row:
+                value = row[table_column.name]
+            elif table_column.default is None:
+                # not in the first row, COPY can't fall back to the server
+                # default of a column other rows have
+                if not table_column.nullable or (
+                    table_column.server_default is not None
+                ):
+                    raise ValueError(
+                        f"No value for {table_column.name!r} "
+                        f"in a row of {self._model.__tablename__} COPY"
+                    )
+                value = None
+            elif table_column.default.is_callable:
+                value = table_column.default.arg(None)
+            else:
+                value = table_column.default.arg
+            # sqlalchemy stores enums by name
+            record.append(value.name if isinstance(value, Enum) else value)
+        return tuple(record)
+
+    async def copy_many(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | CreateSchemaType],
+        chunk_size: int | None = None,
+    ) -> int:
+        """asyncpg COPY into the model table in the session transaction.
+        Python side column defaults are applied, nothing is returned"""
+        rows = self._dump_objs(objs_in)
+        if not rows:
+            return 0
+        table = self._model.__table__
+        columns = [
+            table_column
+            for table_column in table.columns
+            if table_column.name in rows[0] or table_column.default is not None
+        ]
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        if not driver_connection.is_in_transaction():
+            # the asyncpg adapter begins a transaction lazily,
+            # on the first statement executed through sqlalchemy
+            await connection.exec_driver_sql("SELECT 1")
+        for chunk in chunked(
+            rows, self._chunk_size(chunk_size) * self._COPY_CHUNK_FACTOR
+        ):
+            await driver_connection.copy_records_to_table(
+                table.name,
+                schema_name=table.schema,
+                columns=[table_column.name for table_column in columns],
+                records=[self._copy_record(row, columns) for row in chunk],
+            )
+        return len(rows)
+
+    async def update_many(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | CreateSchemaType],
+        update_fields: list[str] | None = None,
+        chunk_size: int | None = None,
+    ) -> list[ModelType]:
+        """UPDATE ... FROM (VALUES ...) ... RETURNING by primary key,
+        one round-trip per chunk. Objects have to contain primary key"""
+        rows = self._dump_objs(objs_in)
+        if not rows:
+            return []
+        table = self._model.__table__
+        primary_keys = self._primary_key_names
+        if update_fields is None:
+            update_fields = [
+                field for field in rows[0] if field not in primary_keys
+            ]
+        fields = primary_keys + update_fields
+
+        db_objs = []
+        for chunk in chunked(rows, self._chunk_size(chunk_size)):
+            rows_values = values(
+                *[column(field, table.c[field].type) for field in fields],
+                name="rows_values",
+            ).data([tuple(row[field] for field in fields) for row in chunk])
+            stmt = (
+                update(self._model)
+                .where(
+                    *[
+                        getattr(self._model, key) == rows_values.c[key]
+                        for key in primary_keys
+                    ]
+                )
+                .values(
+                    {field: rows_values.c[field] for field in update_fields}
+                )
+                .returning(self._model)
+                .execution_options(populate_existing=True)
+            )
+            db_objs.extend((await session.scalars(stmt)).all())
+        return db_objs
+
+    async def delete_many(
+        self,
+        session: AsyncSession,
+        *,
+        ids: list,
+        chunk_size: int | None = None,
+    ) -> int:
+        """DELETE by primary key, one round-trip per chunk"""
+        primary_key = getattr(self._model, self._primary_key_names[0])
+        deleted = 0
+        for chunk in chunked(ids, self._chunk_size(chunk_size)):
+            result: CursorResult = await session.execute(
+                delete(self._model).where(primary_key.in_(chunk))
+            )
+            deleted += result.rowcount
+        await session.flush()
+        return deleted
@@ -0,0 +1,57 @@
+from datetime import datetime
+from functools import cache
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.common import CRUDBase
+from src.models.payment import Payment
+from src.schemas.payment import PaymentSchema, PaymentSchemaCreate
+from src.utils.settings import PaymentStatusEnum
+
+
+class PaymentCrud(CRUDBase[Payment, PaymentSchema, PaymentSchemaCreate]):
+    async def get_by_charge_id_raw(
+        self, session: AsyncSession, charge_id: str
+    ) -> Payment | None:
+        payments = await self.get_multi_raw(
+            session, limit=1, charge_id=charge_id
+        )
+        return payments[0] if payments else None
+
+    async def set_refunded(
+        self, session: AsyncSession, charge_id: str
+    ) -> bool:
+        """False if the payment isn't paid anymore"""
+        updated = await self.update(
+            session,
+            update_filter={
+                "charge_id": charge_id,
+                "status": PaymentStatusEnum.paid,
+            },
+            update_values={"status": PaymentStatusEnum.refunded},
+        )
+        return updated > 0
+
+    async def get_revenue(
+        self, session: AsyncSession, since: datetime | None = None
+    ) -> list[tuple[str, int, int]]:
+        """Paid not refunded payments: currency, count, amount"""
+        stmt = (
+            select(
+                self._model.currency,
+                func.count(),
+                func.sum(self._model.amount),
+            )
+            .where(self._model.status == PaymentStatusEnum.paid)
+            .group_by(self._model.currency)
+            .order_by(self._model.currency)
+        )
+        if since is not None:
+            stmt = stmt.where(self._model.create_datetime >= since)
+        return (await session.execute(stmt)).all()
+
+
+@cache
+def get_payment_crud() -> PaymentCrud:
+    return PaymentCrud(Payment)
@@ -0,0 +1,36 @@
+from functools import cache
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.common import CRUDBase
+from src.models.pending_update import PendingUpdate
+from src.schemas.pending_update import (
+    PendingUpdateSchema,
+    PendingUpdateSchemaCreate,
+)
+
+
+class PendingUpdateCrud(
+    CRUDBase[PendingUpdate, PendingUpdateSchema, PendingUpdateSchemaCreate]
+):
+    async def add_attempt(self, session: AsyncSession, update_id: int):
+        """Count a failed handling of the update"""
+        await session.execute(
+            update(self._model)
+            .where(self._model.update_id == update_id)
+            .values(attempts=self._model.attempts + 1)
+        )
+
+    async def count_dead(
+        self, session: AsyncSession, max_attempts: int
+    ) -> int:
+        """Updates failed `max_attempts` times, kept but not replayed"""
+        return await session.scalar(
+            select(func.count()).where(self._model.attempts >= max_attempts)
+        )
+
+
+@cache
+def get_pending_update_crud() -> PendingUpdateCrud:
+    return PendingUpdateCrud(PendingUpdate)
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from functools import cache
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.common import CRUDBase
+from src.models.provision_job import ProvisionJob
+from src.schemas.provision_job import (
+    ProvisionJobSchema,
+    ProvisionJobSchemaCreate,
+)
+from src.utils.settings import ProvisionStateEnum
+
+
+class ProvisionJobCrud(
+    CRUDBase[ProvisionJob, ProvisionJobSchema, ProvisionJobSchemaCreate]
+):
+    async def claim(
+        self,
+        session: AsyncSession,
+        charge_id: str,
+        *,
+        now: datetime,
+        lease: timedelta,
+    ) -> ProvisionJob | None:
+        """Take a due pending job for one attempt by one UPDATE.
+
+        The next attempt is moved `lease` forward, so the job is retried
+        after it if the attempt is lost. None if the job isn't due"""
+        stmt = (
+            update(self._model)
+            .where(
+                self._model.charge_id == charge_id,
+                self._model.state == ProvisionStateEnum.pending,
+                self._model.next_attempt_datetime <= now,
+            )
+            .values(
+                attempts=self._model.attempts + 1,
+                next_attempt_datetime=now + lease,
+            )
+            .returning(self._model)
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.execute(stmt)).scalars().first()
+
+    async def finish(
+        self,
+        session: AsyncSession,
+        charge_id: str,
+        state: ProvisionStateEnum,
+        error: str | None = None,
+    ):
+        await self.update(
+            session,
+            update_filter={"charge_id": charge_id},
+            update_values={"state": state, "error": error},
+            is_patch=False,
+        )
+
+    async def retry_later(
+        self,
+        session: AsyncSession,
+        charge_id: str,
+        *,
+        at: datetime,
+        error: str,
+    ):
+        await self.update(
+            session,
+            update_filter={"charge_id": charge_id},
+            update_values={"next_attempt_datetime": at, "error": error},
+        )
+
+    async def get_pending(
+        self, session: AsyncSession, limit: int
+    ) -> list[tuple[str, datetime]]:
+        """Pending jobs charge IDs with the next attempt datetime"""
+        stmt = (
+            select(self._model.charge_id, self._model.next_attempt_datetime)
+            .where(self._model.state == ProvisionStateEnum.pending)
+            .order_by(self._model.next_attempt_datetime)
+            .limit(limit)
+        )
+        return (await session.execute(stmt)).all()
+
+
+@cache
+def get_provision_job_crud() -> ProvisionJobCrud:
+    return ProvisionJobCrud(ProvisionJob)
@@ -1,11 +1,202 @@
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime
 from functools import cache
 
-from src.crud.common import CRUDBase
+from pydantic import BaseModel
+from sqlalchemy import event, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import OperatorExpression
+
+from src.crud.common import CRUDBase, UpdateFilter
 from src.models.user import User
+from src.models.user_tariff import UserTariff
 from src.schemas.user import UserSchema, UserSchemaCreate
+from src.utils.cache import get_user_cache
+from src.utils.settings import StatusTypeEnum
+
+# session.info key of the users changed in the transaction
+_CHANGED_USERS = "changed_users"
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    if _CHANGED_USERS in session.info:
+        get_user_cache().invalidate(session.info.pop(_CHANGED_USERS))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session):
+    session.info.pop(_CHANGED_USERS, None)
+
+
+class UserCrud(CRUDBase[User, UserSchema, UserSchemaCreate]):
+    """Writes invalidate the users cache (write-through): the changed
+    users are dropped at once and again after the commit, so a value
+    read by a concurrent transaction in between isn't kept.
+    New users are not invalidated, misses aren't cached"""
+
+    @staticmethod
+    def _changed(session: AsyncSession, user_ids: Iterable[int] | None):
+        """None means any user could be changed"""
+        user_ids = None if user_ids is None else set(user_ids)
+        get_user_cache().invalidate(user_ids)
+        changed = session.info.get(_CHANGED_USERS, set())
+        if changed is None or user_ids is None:
+            session.info[_CHANGED_USERS] = None
+        else:
+            session.info[_CHANGED_USERS] = changed | user_ids
+
+    @staticmethod
+    def _filter_ids(filter_: UpdateFilter) -> list[int] | None:
+        if isinstance(filter_, dict) and "id" in filter_:
+            return [filter_["id"]]
+        return None
+
+    @staticmethod
+    def _objs_ids(objs_in: list[dict | UserSchemaCreate]) -> list[int]:
+        return [
+            obj.id if isinstance(obj, BaseModel) else obj["id"]
+            for obj in objs_in
+        ]
+
+    async def update(
+        self,
+        session: AsyncSession,
+        *,
+        update_filter: UpdateFilter,
+        update_values: dict[str, ...],
+        is_patch=True,
+    ) -> int:
+        updated = await super().update(
+            session,
+            update_filter=update_filter,
+            update_values=update_values,
+            is_patch=is_patch,
+        )
+        if updated:
+            self._changed(session, self._filter_ids(update_filter))
+        return updated
+
+    async def upsert_many(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | UserSchemaCreate],
+        index_elements: list[str] | None = None,
+        update_fields: list[str] | None = None,
+    ) -> list[User]:
+        db_objs = await super().upsert_many(
+            session,
+            objs_in=objs_in,
+            index_elements=index_elements,
+            update_fields=update_fields,
+        )
+        self._changed(session, [db_obj.id for db_obj in db_objs])
+        return db_objs
+
+    async def update_many(
+        self,
+        session: AsyncSession,
+        *,
+        objs_in: list[dict | UserSchemaCreate],
+        update_fields: list[str] | None = None,
+        chunk_size: int | None = None,
+    ) -> list[User]:
+        db_objs = await super().update_many(
+            session,
+            objs_in=objs_in,
+            update_fields=update_fields,
+            chunk_size=chunk_size,
+        )
+        self._changed(session, self._objs_ids(objs_in))
+        return db_objs
+
+    async def delete(
+        self,
+        session: AsyncSession,
+        operator_expressions: list[OperatorExpression] | None = None,
+        **filter_dict: ...,
+    ) -> int:
+        deleted = await super().delete(
+            session, operator_expressions, **filter_dict
+        )
+        if deleted:
+            self._changed(
+                session,
+                (
+                    None
+                    if operator_expressions
+                    else self._filter_ids(filter_dict)
+                ),
+            )
+        return deleted
+
+    async def delete_many(
+        self,
+        session: AsyncSession,
+        *,
+        ids: list,
+        chunk_size: int | None = None,
+    ) -> int:
+        deleted = await super().delete_many(
+            session, ids=ids, chunk_size=chunk_size
+        )
+        self._changed(session, ids)
+        return deleted
+
+    async def stream_ids(
+        self, session: AsyncSession, batch_size: int = 10000
+    ) -> AsyncIterator[list[int]]:
+        """All users Telegram IDs by batches"""
+        result = await session.stream_scalars(
+            select(self._model.id).execution_options(yield_per=batch_size)
+        )
+        async for batch in result.partitions():
+            yield batch
 
+    async def get_ids_page(
+        self,
+        session: AsyncSession,
+        *,
+        limit: int,
+        after: int | None = None,
+        status: StatusTypeEnum | None = None,
+    ) -> list[int]:
+        """Users Telegram IDs in the ID order (keyset pagination)"""
+        stmt = select(self._model.id)
+        if status is not None:
+            stmt = stmt.where(self._model.status == status)
+        if after is not None:
+            stmt = stmt.where(self._model.id > after)
+        stmt = stmt.order_by(self._model.id).limit(limit)
+        return (await session.execute(stmt)).scalars().all()
 
-class UserCrud(CRUDBase[User, UserSchema, UserSchemaCreate]): ...
+    async def set_not_paid(
+        self, session: AsyncSession, user_ids: list[int], at: datetime
+    ) -> list[int]:
+        """Move users without an active subscription at `at`
+        to not paid by one UPDATE. Returns the updated users IDs"""
+        active_subscription = exists().where(
+            UserTariff.user_id == self._model.id,
+            UserTariff.expire_datetime > at,
+        )
+        stmt = (
+            update(self._model)
+            .where(
+                self._model.id.in_(user_ids),
+                self._model.status.in_(
+                    [StatusTypeEnum.paid, StatusTypeEnum.trial]
+                ),
+                ~active_subscription,
+            )
+            .values(status=StatusTypeEnum.not_paid)
+            .returning(self._model.id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = (await session.execute(stmt)).scalars().all()
+        self._changed(session, user_ids)
+        return user_ids
 
 
 @cache
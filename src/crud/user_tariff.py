@@ -1,5 +1,11 @@
+from datetime import datetime
 from functools import cache
 
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.crud.common import CRUDBase
 from src.models.user_tariff import UserTariff
 from src.schemas.user_tariff import UserTariffSchema, UserTariffSchemaCreate
@@ -7,7 +13,47 @@ from src.schemas.user_tariff import UserTariffSchema, UserTariffSchemaCreate
 
 class UserTariffCrud(
     CRUDBase[UserTariff, UserTariffSchema, UserTariffSchemaCreate]
-): ...
+):
+    async def get_active_raw(
+        self, session: AsyncSession, user_id: int, at: datetime | None = None
+    ) -> UserTariff | None:
+        """The user subscription which expires last"""
+        stmt = (
+            select(self._model)
+            .where(
+                self._model.user_id == user_id,
+                self._model.expire_datetime > (at or datetime.now()),
+            )
+            .order_by(self._model.expire_datetime.desc())
+            .limit(1)
+        )
+        return (await session.execute(stmt)).scalars().first()
+
+    async def get_expiring_raw(
+        self, session: AsyncSession, before: datetime, limit: int
+    ) -> list[UserTariff]:
+        """Not processed subscriptions which expire before `before`
+        in the expiry order"""
+        stmt = (
+            select(self._model)
+            .where(
+                # matches the partial index predicate
+                ~self._model.expired,
+                self._model.expire_datetime <= before,
+            )
+            .order_by(self._model.expire_datetime)
+            .limit(limit)
+        )
+        return (await session.execute(stmt)).scalars().all()
+
+    async def set_expired(self, session: AsyncSession, ids: list[UUID]):
+        """Mark subscriptions as processed by one UPDATE"""
+        await session.execute(
+            update(self._model)
+            .where(self._model.id.in_(ids))
+            .values(expired=True)
+            .execution_options(synchronize_session=False)
+        )
 
 
 @cache
@@ -1,5 +1,6 @@
 from typing import TypeAlias
 
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -8,6 +9,7 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import as_declarative, declared_attr
 
+from src.database.pool import InstrumentedAsyncPool
 from src.utils.common import camel_to_snake
 from src.utils.settings import get_settings
 
@@ -57,6 +59,7 @@ class Base:
     def default_order_fields(cls) -> list[str]:
         raise NotImplementedError
 
+
 def id_column(model_name_id: str) -> str:
     """jus a simple function that converts ModelName to model_name
     and join the result with a column name after dot in model_name_id"""
@@ -72,9 +75,37 @@ def id_column(model_name_id: str) -> str:
 AsyncSessionGenerator: TypeAlias = async_sessionmaker[AsyncSession]
 
 
+# process-wide engines (and pools) by url
+_engines: dict[str, AsyncEngine] = {}
+
+
+def create_engine(driver_url: str) -> AsyncEngine:
+    settings = get_settings().db
+    url = make_url(driver_url).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.statement_cache_size)}
+    )
+    return create_async_engine(
+        url,
+        future=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.pool_max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+    )
+
+
 def get_engine(driver_url=None) -> AsyncEngine:
     driver_url = driver_url or get_settings().db.driver_url
-    return create_async_engine(driver_url, future=True)
+    if (engine := _engines.get(driver_url)) is None:
+        engine = _engines[driver_url] = create_engine(driver_url)
+    return engine
+
+
+async def dispose_engines():
+    for engine in _engines.values():
+        await engine.dispose()
 
 
 def create_new_session_connection(
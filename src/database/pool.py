@@ -0,0 +1,78 @@
+import asyncio
+from dataclasses import dataclass
+from time import perf_counter
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+
+@dataclass
+class PoolStats:
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waits: int
+    wait_time_total: float
+    wait_time_max: float
+
+    @property
+    def wait_time_avg(self) -> float:
+        return self.wait_time_total / self.waits if self.waits else 0.0
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Async queue pool which measures the waits of the checkouts blocked
+    till a connection is returned to the pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        # a checkout blocks only without an idle connection and the overflow
+        # left, the others take one at once or open a new one
+        if not self._pool.empty() or not (
+            -1 < self._max_overflow <= self._overflow
+        ):
+            return super()._do_get()
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = perf_counter() - start
+            self.waits += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            overflow=self.overflow(),
+            waits=self.waits,
+            wait_time_total=self.wait_time_total,
+            wait_time_max=self.wait_time_max,
+        )
+
+
+def get_pool_stats(engine: AsyncEngine) -> PoolStats | None:
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedAsyncPool):
+        return None
+    return pool.stats()
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int):
+    """Open the pool connections in advance, not on the first updates"""
+    opened = [engine.connect() for _ in range(connections)]
+    try:
+        await asyncio.gather(*(connection.start() for connection in opened))
+    finally:
+        await asyncio.gather(
+            *(connection.close() for connection in opened),
+            return_exceptions=True,
+        )
@@ -2,3 +2,7 @@ from src.database.database import Base  # noqa
 from src.models.user import User  # noqa
 from src.models.tariff import Tariff  # noqa
 from src.models.user_tariff import UserTariff  # noqa
+from src.models.broadcast import Broadcast  # noqa
+from src.models.pending_update import PendingUpdate  # noqa
+from src.models.provision_job import ProvisionJob  # noqa
+from src.models.payment import Payment  # noqa
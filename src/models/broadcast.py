@@ -0,0 +1,36 @@
+from sqlalchemy import Column, BigInteger, Integer
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.orm import Mapped
+
+from src.database.database import Base
+from src.database.mixins import IntID, DateTimeCreateMixin
+from src.utils.settings import BroadcastStateEnum, StatusTypeEnum
+
+
+class Broadcast(IntID, DateTimeCreateMixin, Base):
+    from_chat_id: int = Column(
+        BigInteger, nullable=False, comment="Source message chat ID"
+    )
+    message_id: int = Column(
+        Integer, nullable=False, comment="Source message ID"
+    )
+    status: Mapped[StatusTypeEnum | None] = Column(
+        ENUM(StatusTypeEnum),
+        nullable=True,
+        comment="Recipients status, all users if null",
+    )
+    state: Mapped[BroadcastStateEnum] = Column(
+        ENUM(BroadcastStateEnum),
+        nullable=False,
+        default=BroadcastStateEnum.running,
+        comment="Broadcast state",
+    )
+    last_user_id: int = Column(
+        BigInteger,
+        nullable=True,
+        comment="Checkpoint, all users up to the ID are processed",
+    )
+    sent: int = Column(Integer, nullable=False, default=0, server_default="0")
+    failed: int = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
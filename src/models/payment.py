@@ -0,0 +1,35 @@
+from sqlalchemy import Column, BigInteger, Index, Integer, String
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.orm import Mapped
+
+from src.database.database import Base
+from src.database.mixins import IntID, DateTimeCreateMixin
+from src.utils.settings import PaymentStatusEnum
+
+
+class Payment(IntID, DateTimeCreateMixin, Base):
+    charge_id: str = Column(
+        String, nullable=False, comment="Telegram payment charge ID"
+    )
+    provider_charge_id: str = Column(
+        String, nullable=True, comment="Provider payment charge ID"
+    )
+    user_id: int = Column(
+        BigInteger, nullable=False, comment="Payer ID in Telegram"
+    )
+    payload: str = Column(String, nullable=False, comment="Invoice payload")
+    amount: int = Column(
+        Integer, nullable=False, comment="Amount in the currency minor units"
+    )
+    currency: str = Column(String(3), nullable=False, comment="Currency code")
+    status: Mapped[PaymentStatusEnum] = Column(
+        ENUM(PaymentStatusEnum),
+        nullable=False,
+        default=PaymentStatusEnum.paid,
+        comment="Payment status",
+    )
+
+    __table_args__ = (
+        # duplicate deliveries and refunds lookup
+        Index("ix_pushka_vpn_payment_charge_id", "charge_id", unique=True),
+    )
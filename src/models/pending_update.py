@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, Integer, Text
+
+from src.database.database import Base
+from src.database.mixins import DateTimeCreateMixin
+
+
+class PendingUpdate(DateTimeCreateMixin, Base):
+    update_id: int = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=False,
+        comment="Telegram update ID",
+    )
+    payload: str = Column(Text, nullable=False, comment="Update JSON")
+    attempts: int = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="Failed handling attempts",
+    )
@@ -0,0 +1,61 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Uuid,
+)
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.orm import Mapped
+
+from src.database.database import Base, id_column
+from src.database.mixins import DateTimeCreateMixin
+from src.utils.settings import ProvisionStateEnum
+
+
+class ProvisionJob(DateTimeCreateMixin, Base):
+    charge_id: str = Column(
+        String, primary_key=True, comment="Telegram payment charge ID"
+    )
+    user_id: int = Column(
+        BigInteger,
+        ForeignKey(id_column("User.id"), ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_tariff_id: UUID = Column(
+        Uuid,
+        ForeignKey(id_column("UserTariff.id"), ondelete="CASCADE"),
+        nullable=False,
+        comment="Purchased subscription",
+    )
+    state: Mapped[ProvisionStateEnum] = Column(
+        ENUM(ProvisionStateEnum),
+        nullable=False,
+        default=ProvisionStateEnum.pending,
+        comment="Provisioning state",
+    )
+    attempts: int = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    next_attempt_datetime: datetime = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.now,
+        comment="Not claimed before, the lease of a running attempt",
+    )
+    error: str = Column(String, nullable=True, comment="Last attempt error")
+
+    __table_args__ = (
+        # due jobs scan
+        Index(
+            "ix_pushka_vpn_provision_job_state_next_attempt_datetime",
+            "state",
+            "next_attempt_datetime",
+        ),
+    )
@@ -1,9 +1,52 @@
-from sqlalchemy import Column, Integer
+from datetime import datetime
 
-from src.database.database import Base
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    false,
+    text,
+)
+
+from src.database.database import Base, id_column
 from src.database.mixins import DateTimeCreateMixin, UUIDMixin
 
 
 class UserTariff(UUIDMixin, DateTimeCreateMixin, Base):
-    user_id: int = Column(Integer, nullable=False)
-    tariff_id: int = Column(Integer, nullable=False)
+    user_id: int = Column(
+        BigInteger,
+        ForeignKey(id_column("User.id"), ondelete="CASCADE"),
+        nullable=False,
+    )
+    tariff_id: int = Column(
+        Integer, ForeignKey(id_column("Tariff.id")), nullable=False
+    )
+    expire_datetime: datetime = Column(
+        DateTime, nullable=False, comment="Subscription expiry datetime"
+    )
+    expired: bool = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        server_default=false(),
+        comment="Subscription expiry is processed",
+    )
+
+    __table_args__ = (
+        # user active subscription lookup
+        Index(
+            "ix_pushka_vpn_user_tariff_user_id_expire_datetime",
+            "user_id",
+            "expire_datetime",
+        ),
+        # next expiring subscriptions scan
+        Index(
+            "ix_pushka_vpn_user_tariff_expire_datetime_not_expired",
+            "expire_datetime",
+            postgresql_where=text("NOT expired"),
+        ),
+    )
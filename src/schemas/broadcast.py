@@ -0,0 +1,21 @@
+from src.schemas.common import (
+    OrmSchema,
+    CreateDateTimeMixinSchema,
+    IntIDSchema,
+)
+from src.utils.settings import BroadcastStateEnum, StatusTypeEnum
+
+
+class BroadcastSchemaCreate(OrmSchema):
+    from_chat_id: int
+    message_id: int
+    status: StatusTypeEnum | None = None
+
+
+class BroadcastSchema(
+    IntIDSchema, BroadcastSchemaCreate, CreateDateTimeMixinSchema
+):
+    state: BroadcastStateEnum
+    last_user_id: int | None
+    sent: int
+    failed: int
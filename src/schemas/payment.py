@@ -0,0 +1,21 @@
+from src.schemas.common import (
+    OrmSchema,
+    CreateDateTimeMixinSchema,
+    IntIDSchema,
+)
+from src.utils.settings import PaymentStatusEnum
+
+
+class PaymentSchemaCreate(OrmSchema):
+    charge_id: str
+    provider_charge_id: str | None = None
+    user_id: int
+    payload: str
+    amount: int
+    currency: str
+
+
+class PaymentSchema(
+    IntIDSchema, PaymentSchemaCreate, CreateDateTimeMixinSchema
+):
+    status: PaymentStatusEnum
@@ -0,0 +1,12 @@
+from src.schemas.common import OrmSchema, CreateDateTimeMixinSchema
+
+
+class PendingUpdateSchemaCreate(OrmSchema):
+    update_id: int
+    payload: str
+
+
+class PendingUpdateSchema(
+    PendingUpdateSchemaCreate, CreateDateTimeMixinSchema
+):
+    attempts: int
@@ -0,0 +1,18 @@
+from datetime import datetime
+from uuid import UUID
+
+from src.schemas.common import OrmSchema, CreateDateTimeMixinSchema
+from src.utils.settings import ProvisionStateEnum
+
+
+class ProvisionJobSchemaCreate(OrmSchema):
+    charge_id: str
+    user_id: int
+    user_tariff_id: UUID
+
+
+class ProvisionJobSchema(ProvisionJobSchemaCreate, CreateDateTimeMixinSchema):
+    state: ProvisionStateEnum
+    attempts: int
+    next_attempt_datetime: datetime
+    error: str | None
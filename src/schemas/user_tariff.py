@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from src.schemas.common import (
     OrmSchema,
     CreateDateTimeMixinSchema,
@@ -8,8 +10,10 @@ from src.schemas.common import (
 class UserTariffSchemaCreate(OrmSchema):
     user_id: int
     tariff_id: int
+    expire_datetime: datetime
 
 
 class UserTariffSchema(
     UUIDIndexSchema, UserTariffSchemaCreate, CreateDateTimeMixinSchema
-): ...
+):
+    expired: bool
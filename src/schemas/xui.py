@@ -0,0 +1,50 @@
+import uuid
+
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.alias_generators import to_camel
+
+
+class XuiSchema(BaseModel):
+    """3x-ui panel objects use camelCase keys"""
+
+    model_config = ConfigDict(
+        alias_generator=to_camel, populate_by_name=True, extra="ignore"
+    )
+
+
+class XuiClientSchema(XuiSchema):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    email: str
+    enable: bool = True
+    flow: str = ""
+    limit_ip: int = 0
+    total_gb: int = Field(default=0, alias="totalGB")
+    # unix time in milliseconds, 0 is never
+    expiry_time: int = 0
+    tg_id: int | str = ""
+    sub_id: str = ""
+    reset: int = 0
+
+
+class XuiClientTrafficSchema(XuiSchema):
+    id: int
+    inbound_id: int
+    enable: bool
+    email: str
+    up: int
+    down: int
+    expiry_time: int
+    total: int
+
+
+class XuiInboundSchema(XuiSchema):
+    id: int
+    remark: str = ""
+    enable: bool
+    protocol: str
+    port: int
+    up: int = 0
+    down: int = 0
+    # JSON string with the clients list
+    settings: str = "{}"
+    client_stats: list[XuiClientTrafficSchema] | None = None
@@ -0,0 +1,255 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cache
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+)
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.crud.broadcast import get_broadcast_crud
+from src.crud.user import get_user_crud
+from src.database.database import AsyncSessionLocal
+from src.schemas.broadcast import BroadcastSchema
+from src.utils.settings import BroadcastStateEnum, get_settings
+
+# bad requests about the broadcast message itself, not the recipient
+SOURCE_MESSAGE_ERRORS = (
+    "message to copy not found",
+    "message_id_invalid",
+    "message can't be copied",
+)
+
+
+class BroadcastAbortEx(Exception): ...
+
+
+@dataclass(slots=True)
+class _Delivery:
+    user_id: int
+    sent: bool | None = None
+
+
+class _Progress:
+    """Broadcast counters up to the checkpoint.
+
+    Messages are sent concurrently, so the checkpoint is the last
+    user ID all the users before which are processed"""
+
+    def __init__(self, broadcast: BroadcastSchema):
+        self.last_user_id = broadcast.last_user_id
+        self.sent = broadcast.sent
+        self.failed = broadcast.failed
+        self.unsaved = 0
+        # the reason the broadcast is aborted
+        self.error: str | None = None
+        self._window: deque[_Delivery] = deque()
+
+    def add(self, user_id: int) -> _Delivery:
+        delivery = _Delivery(user_id)
+        self._window.append(delivery)
+        return delivery
+
+    def complete(self, delivery: _Delivery, sent: bool):
+        delivery.sent = sent
+        while self._window and self._window[0].sent is not None:
+            done = self._window.popleft()
+            self.last_user_id = done.user_id
+            if done.sent:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self.unsaved += 1
+
+
+class Broadcaster:
+    """Sends a copy of the admin message to the users.
+
+    Recipients are read by keyset pages of the users table, messages
+    are sent by concurrent workers. The bot outgoing limiter paces them
+    in the lowest priority lane, behind the replies to the users,
+    and retries them after flood control errors. Progress is saved every
+    `checkpoint_every` messages, a broadcast interrupted by a restart
+    continues from the checkpoint. One broadcast at a time"""
+
+    def __init__(
+        self, workers: int, checkpoint_every: int, page_size: int = 1000
+    ):
+        self._workers = workers
+        self._checkpoint_every = checkpoint_every
+        self._page_size = page_size
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot: Bot, broadcast: BroadcastSchema):
+        if self.is_running:
+            raise RuntimeError("Another broadcast is running")
+        self._task = asyncio.create_task(
+            self._run(bot, broadcast), name=f"broadcast-{broadcast.id}"
+        )
+
+    async def resume(self, bot: Bot):
+        """Continue a broadcast interrupted by the bot restart"""
+        crud = get_broadcast_crud()
+        async with AsyncSessionLocal() as session:
+            broadcast = await crud.get_running(session)
+            if broadcast is None:
+                return
+            broadcast = crud.schema_mapper.one(broadcast)
+        logger.info(
+            f"Resume broadcast №{broadcast.id} "
+            f"after user {broadcast.last_user_id}"
+        )
+        self.start(bot, broadcast)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _recipients(
+        self, broadcast: BroadcastSchema
+    ) -> AsyncIterator[int]:
+        after = broadcast.last_user_id
+        while True:
+            async with AsyncSessionLocal() as session:
+                page = await get_user_crud().get_ids_page(
+                    session,
+                    limit=self._page_size,
+                    after=after,
+                    status=broadcast.status,
+                )
+            for user_id in page:
+                yield user_id
+            if len(page) < self._page_size:
+                return
+            after = page[-1]
+
+    @staticmethod
+    async def _save(
+        broadcast: BroadcastSchema,
+        progress: _Progress,
+        state: BroadcastStateEnum = BroadcastStateEnum.running,
+    ) -> bool:
+        async with AsyncSessionLocal() as session:
+            running = await get_broadcast_crud().save_progress(
+                session,
+                broadcast.id,
+                last_user_id=progress.last_user_id,
+                sent=progress.sent,
+                failed=progress.failed,
+                state=state,
+            )
+            await session.commit()
+        progress.unsaved = 0
+        return running
+
+    @staticmethod
+    async def _send(bot: Bot, broadcast: BroadcastSchema, user_id: int):
+        try:
+            await bot.copy_message(
+                chat_id=user_id,
+                from_chat_id=broadcast.from_chat_id,
+                message_id=broadcast.message_id,
+            )
+            return True
+        except TelegramBadRequest as e:
+            if any(
+                error in e.message.lower() for error in SOURCE_MESSAGE_ERRORS
+            ):
+                # no one gets it, f.e. the admin deleted the message
+                raise BroadcastAbortEx(e.message) from e
+            # the chat is deleted
+            logger.trace("Broadcast to user {} failed: {}", user_id, e)
+            return False
+        except TelegramForbiddenError as e:
+            # the bot is blocked
+            logger.trace("Broadcast to user {} failed: {}", user_id, e)
+            return False
+        except TelegramAPIError as e:
+            # flood control included: the limiter retries are over
+            logger.error(f"Broadcast to user {user_id} failed: {e}")
+            return False
+
+    async def _worker(
+        self,
+        bot: Bot,
+        broadcast: BroadcastSchema,
+        deliveries: asyncio.Queue,
+        progress: _Progress,
+    ):
+        while (delivery := await deliveries.get()) is not None:
+            if progress.error is not None:
+                # aborted: the queue is drained, the checkpoint stays
+                continue
+            try:
+                sent = await self._send(bot, broadcast, delivery.user_id)
+            except BroadcastAbortEx as e:
+                progress.error = str(e)
+                continue
+            progress.complete(delivery, sent)
+
+    async def _run(self, bot: Bot, broadcast: BroadcastSchema):
+        logger.info(f"Broadcast №{broadcast.id} started")
+        progress = _Progress(broadcast)
+        deliveries = asyncio.Queue(maxsize=self._workers * 2)
+        workers = [
+            asyncio.create_task(
+                self._worker(bot, broadcast, deliveries, progress)
+            )
+            for _ in range(self._workers)
+        ]
+        state = BroadcastStateEnum.done
+        try:
+            async for user_id in self._recipients(broadcast):
+                if progress.error is not None:
+                    break
+                await deliveries.put(progress.add(user_id))
+                if progress.unsaved < self._checkpoint_every:
+                    continue
+                if not await self._save(broadcast, progress):
+                    state = BroadcastStateEnum.cancelled
+                    break
+            for _ in workers:
+                await deliveries.put(None)
+            await asyncio.gather(*workers)
+            if progress.error is not None:
+                logger.error(
+                    f"Broadcast №{broadcast.id} aborted: {progress.error}"
+                )
+                state = BroadcastStateEnum.cancelled
+            await self._save(broadcast, progress, state)
+        except asyncio.CancelledError:
+            # bot shutdown: keep the progress, resume on the next start
+            with suppress(SQLAlchemyError):
+                await self._save(broadcast, progress)
+            raise
+        except SQLAlchemyError as e:
+            logger.error(f"Broadcast №{broadcast.id} interrupted: {e}")
+            return
+        finally:
+            for worker in workers:
+                worker.cancel()
+        logger.info(
+            f"Broadcast №{broadcast.id} {state.value}. "
+            f"Sent: {progress.sent}, failed: {progress.failed}"
+        )
+
+
+@cache
+def get_broadcaster() -> Broadcaster:
+    settings = get_settings().broadcast
+    return Broadcaster(settings.workers, settings.checkpoint_every)
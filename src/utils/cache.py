@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from functools import cache
+from time import monotonic
+from typing import Generic, TypeVar
+
+from src.schemas.user import UserSchema
+from src.utils.settings import get_settings
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class LruTtlCache(Generic[KeyType, ValueType]):
+    """In-memory cache with the entries TTL and the size limit.
+
+    Entries are kept in the last access order, the least recently used
+    one is evicted over `max_size`.
+
+    Every invalidation bumps the generation: a value loaded before it
+    may be stale, so `set` with an older generation is ignored"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries: OrderedDict[KeyType, tuple[float, ValueType]] = (
+            OrderedDict()
+        )
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: KeyType) -> ValueType | None:
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return None
+        expire_at, value = entry
+        if expire_at <= monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self, key: KeyType, value: ValueType, generation: int | None = None
+    ):
+        """Save the value loaded at `generation` (the current if None)"""
+        if generation is not None and generation != self._generation:
+            return
+        self._entries[key] = (monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[KeyType] | None = None):
+        """Drop the keys, all the entries if None"""
+        self._generation += 1
+        if keys is None:
+            self._entries.clear()
+            return
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+@cache
+def get_user_cache() -> LruTtlCache[int, UserSchema]:
+    settings = get_settings().cache
+    return LruTtlCache(settings.user_ttl, settings.user_max_size)
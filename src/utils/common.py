@@ -1,4 +1,6 @@
 import re
+from collections.abc import Iterable, Iterator
+from itertools import islice
 
 
 REGULAR_COMP = re.compile(r"((?<=[a-z\d])[A-Z]|(?!^)[A-Z](?=[a-z]))")
@@ -6,3 +8,10 @@ REGULAR_COMP = re.compile(r"((?<=[a-z\d])[A-Z]|(?!^)[A-Z](?=[a-z]))")
 
 def camel_to_snake(camel_string):
     return REGULAR_COMP.sub(r"_\1", camel_string).lower()
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of `size` items"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -1,5 +1,8 @@
+import json
 import sys
+import traceback
 from pathlib import Path
+from time import monotonic
 
 from loguru import logger
 
@@ -11,13 +14,91 @@ LOGGER_FORMAT = (
     "<level>{message}</level>"
 )
 
+# DEBUG and TRACE lines are sampled
+SAMPLED_LEVEL_NO = 10
 
-def reinit_logger(log_level: str, log_path: str | None):
-    """Setup logger"""
+
+class CallSiteSampler:
+    """Log filter: at most `limit` debug and trace lines of one call site
+    per `period` seconds. The next line passed after a drop gets
+    the dropped lines count as `extra["sampled_out"]`"""
+
+    def __init__(self, limit: int, period: float = 1.0):
+        self._limit = limit
+        self._period = period
+        # call site: [window start, passed lines, dropped lines]
+        self._windows: dict[tuple[str, int], list] = {}
+        # every sink filters the same record, it is counted once
+        self._last_record: dict | None = None
+        self._last_decision = True
+
+    def __call__(self, record: dict) -> bool:
+        if record["level"].no > SAMPLED_LEVEL_NO:
+            return True
+        if record is not self._last_record:
+            self._last_record = record
+            self._last_decision = self._hit(record)
+        return self._last_decision
+
+    def _hit(self, record: dict) -> bool:
+        key = (record["name"], record["line"])
+        now = monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self._period:
+            self._windows[key] = [now, 1, 0]
+            if window is not None and window[2]:
+                record["extra"]["sampled_out"] = window[2]
+            return True
+        if window[1] < self._limit:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+def json_format(record: dict) -> str:
+    """One JSON line, the bound context (update and user ids) included.
+    Serialized once per record for all the sinks"""
+    if "json" not in record["extra"]:
+        line = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "name": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "message": record["message"],
+            **record["extra"],
+        }
+        if record["exception"] is not None:
+            line["exception"] = "".join(
+                traceback.format_exception(*record["exception"])
+            )
+        record["extra"]["json"] = json.dumps(
+            line, ensure_ascii=False, default=str
+        )
+    return "{extra[json]}\n"
+
+
+def reinit_logger(
+    log_level: str,
+    log_path: str | None,
+    *,
+    json_logs: bool = False,
+    enqueue: bool = False,
+    sample_limit: int = 0,
+):
+    """Setup logger.
+
+    With `enqueue` the sinks are written by a background thread,
+    `await logger.complete()` flushes them"""
     logger.remove()
-    logger.add(
-        sys.stderr, level=log_level, format=LOGGER_FORMAT, colorize=True
-    )
+    sink_options = {
+        "level": log_level,
+        "format": json_format if json_logs else LOGGER_FORMAT,
+        "enqueue": enqueue,
+        "filter": CallSiteSampler(sample_limit) if sample_limit else None,
+    }
+    logger.add(sys.stderr, colorize=not json_logs, **sink_options)
     logger.log(log_level, "Logger re-inited")
 
     if not log_path:
@@ -28,6 +109,4 @@ def reinit_logger(log_level: str, log_path: str | None):
     log_file = log_path / "app.log"
 
     logger.log(log_level, f"Log directory: {log_path}")
-    logger.add(
-        log_file, level=log_level, format=LOGGER_FORMAT, rotation="2 week"
-    )
+    logger.add(log_file, rotation="2 week", **sink_options)
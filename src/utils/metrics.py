@@ -0,0 +1,251 @@
+from bisect import bisect_left
+from collections.abc import Iterable
+from functools import cache
+from time import perf_counter
+
+from aiohttp import web
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils.settings import get_settings
+
+# seconds, from a cached query to a slow Telegram request
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[tuple[str, str]]) -> str:
+    labels = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{labels}}}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_: str
+
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_
+        self.labels = labels
+
+    def _check(self, label_values: LabelValues):
+        if len(label_values) != len(self.labels):
+            raise ValueError(
+                f"{self.name} labels are {self.labels}, got {label_values}"
+            )
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.help}",
+                f"# TYPE {self.name} {self.type_}",
+                *self.samples(),
+            ]
+        )
+
+
+class Counter(Metric):
+    type_ = "counter"
+
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help_, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self._check(label_values)
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterable[str]:
+        for label_values, value in sorted(self._values.items()):
+            labels = _format_labels(zip(self.labels, label_values))
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Observations counts by the upper bounds, not cumulative
+    till rendered, so `observe` is one bisect and two additions"""
+
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_, labels)
+        self._bounds = tuple(sorted(buckets))
+        # label values: [bucket counts..., +Inf count], sum
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        if (series := self._series.get(label_values)) is None:
+            self._check(label_values)
+            series = self._series[label_values] = (
+                [0] * (len(self._bounds) + 1),
+                [0.0],
+            )
+        counts, total = series
+        counts[bisect_left(self._bounds, value)] += 1
+        total[0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series is not None else 0
+
+    def samples(self) -> Iterable[str]:
+        bounds = [*self._bounds, float("inf")]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            pairs = list(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels([*pairs, ("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(pairs)
+            yield f"{self.name}_sum{labels} {_format_value(total[0])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if (registered := self._metrics.get(metric.name)) is not None:
+            return registered
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, help_: str, labels: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, help_, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        return (
+            "\n\n".join(
+                metric.render() for _, metric in sorted(self._metrics.items())
+            )
+            + "\n"
+        )
+
+
+@cache
+def get_metrics_registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+class DatabaseMetrics:
+    """SQL statements timing by the engine cursor events"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.duration = registry.histogram(
+            "db_statement_duration_seconds",
+            "SQL statement execution time",
+            ("operation",),
+        )
+        self.errors = registry.counter(
+            "db_statement_errors_total",
+            "Failed SQL statements",
+            ("operation",),
+        )
+        self._installed = False
+
+    @staticmethod
+    def _operation(statement: str) -> str:
+        operation, *_ = statement.lstrip().split(None, 1) or ("",)
+        return operation.upper()
+
+    def _before(self, conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("metrics_start", []).append(perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, many):
+        start = conn.info["metrics_start"].pop()
+        self.duration.observe(
+            perf_counter() - start, self._operation(statement)
+        )
+
+    def _error(self, context):
+        if (conn := context.connection) is not None:
+            if starts := conn.info.get("metrics_start"):
+                starts.pop()
+        self.errors.inc(self._operation(context.statement or ""))
+
+    def install(self):
+        """Time the statements of every engine"""
+        if self._installed:
+            return
+        event.listen(Engine, "before_cursor_execute", self._before)
+        event.listen(Engine, "after_cursor_execute", self._after)
+        event.listen(Engine, "handle_error", self._error)
+        self._installed = True
+
+
+@cache
+def get_database_metrics() -> DatabaseMetrics:
+    return DatabaseMetrics(get_metrics_registry())
+
+
+async def metrics_handler(_: web.Request) -> web.Response:
+    return web.Response(
+        text=get_metrics_registry().render(),
+        content_type="text/plain",
+        headers={"X-Content-Type-Options": "nosniff"},
+    )
+
+
+async def start_metrics_server(port_offset: int = 0) -> web.AppRunner:
+    """`/metrics` endpoint of the process, shard workers listen
+    on the next ports by their index"""
+    settings = get_settings().metrics
+    app = web.Application()
+    app.router.add_get(settings.path, metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    port = settings.port + port_offset
+    await web.TCPSite(runner, host=settings.host, port=port).start()
+    logger.info(f"Metrics server started on {settings.host}:{port}")
+    return runner
@@ -1,24 +1,44 @@
 from secrets import choice
 
 from loguru import logger
-from sqlalchemy.exc import NoResultFound, SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError
 
-from src.crud.tariff import get_tariff_crud
+from src.crud.payment import get_payment_crud
 from src.database.database import AsyncSessionLocal
-from src.models.tariff import Tariff
+from src.schemas.payment import PaymentSchema
+from src.schemas.tariff import TariffSchema
 from src.utils.settings import get_settings
+from src.utils.tariff import get_tariff_catalog
 
 
-async def get_tariff(tariff_id: int) -> Tariff | None:
+async def get_tariff(tariff_id: int) -> TariffSchema | None:
     try:
-        async with AsyncSessionLocal() as session:
-            return await get_tariff_crud().get_one(session, id=tariff_id)
-    except NoResultFound:
-        logger.error(f"Tariff with ID {tariff_id!r} not found")
-        return None
+        tariff = await get_tariff_catalog().get(tariff_id)
     except SQLAlchemyError as e:
         logger.error(f"Unhandled sqlalchemy error while get tariff: {e}")
         return None
+    if tariff is None:
+        logger.error(f"Tariff with ID {tariff_id!r} not found")
+    return tariff
+
+
+async def get_user_payment(
+    user_id: int, charge_id: str
+) -> PaymentSchema | None:
+    """The user payment from the ledger by one unique index lookup"""
+    crud = get_payment_crud()
+    async with AsyncSessionLocal() as session:
+        payment = await crud.get_by_charge_id_raw(session, charge_id)
+        if payment is None or payment.user_id != user_id:
+            return None
+        return crud.schema_mapper.one(payment)
+
+
+async def set_payment_refunded(charge_id: str) -> bool:
+    async with AsyncSessionLocal() as session:
+        refunded = await get_payment_crud().set_refunded(session, charge_id)
+        await session.commit()
+    return refunded
 
 
 def gen_successful_effect() -> str:
@@ -0,0 +1,61 @@
+import asyncio
+from time import monotonic
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second,
+    bursts up to `capacity` tokens"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self._capacity
+        self._updated_at = monotonic()
+        self._paused_until = 0.0
+        # waiters get tokens in the arrival order
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def is_idle(self) -> bool:
+        """Full and nobody waits, can be dropped and created again"""
+        now = monotonic()
+        if now < self._paused_until or self._lock.locked():
+            return False
+        self._refill(now)
+        return self._tokens >= self._capacity
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated_at) * self._rate,
+        )
+        self._updated_at = now
+
+    def try_acquire(self) -> float:
+        """Take a token if there is one.
+        Returns 0 on success or seconds to wait for the next token"""
+        now = monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    async def acquire(self):
+        async with self._lock:
+            while (delay := self.try_acquire()) > 0:
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Give no tokens for `seconds`, f.e. on a flood control error"""
+        now = monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        # one request goes right after the pause, then the usual rate
+        self._tokens = min(1, self._capacity)
+        self._updated_at = self._paused_until
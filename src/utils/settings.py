@@ -18,6 +18,33 @@ class StatusTypeEnum(Enum):
     not_paid = "not paid"
 
 
+class BotRunModeEnum(Enum):
+    polling = "polling"
+    webhook = "webhook"
+
+
+class UpdatesStoreEnum(Enum):
+    memory = "memory"
+    postgres = "postgres"
+
+
+class BroadcastStateEnum(Enum):
+    running = "running"
+    done = "done"
+    cancelled = "cancelled"
+
+
+class ProvisionStateEnum(Enum):
+    pending = "pending"
+    done = "done"
+    failed = "failed"
+
+
+class PaymentStatusEnum(Enum):
+    paid = "paid"
+    refunded = "refunded"
+
+
 class EnvSettings(BaseSettings):
     """The utils for real sys / docker environment
     it is not for dotenv..."""
@@ -49,6 +76,68 @@ class BotSettings(BaseSettings):
         BotCommand(command="refund", description="Возврат средств"),
     ]
 
+    run_mode: BotRunModeEnum = Field(
+        default=BotRunModeEnum.polling, description="Updates delivery mode"
+    )
+    webhook_url: str | None = Field(
+        default=None, description="Public webhook base url"
+    )
+    webhook_path: str = Field(
+        default="/webhook", description="Webhook route path"
+    )
+    webhook_secret: str | None = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9_-]{0,256}$",
+        description="X-Telegram-Bot-Api-Secret-Token header value",
+    )
+    webhook_host: str = Field(
+        default="0.0.0.0", description="Webhook server listen host"
+    )
+    webhook_port: int = Field(
+        default=8080, description="Webhook server listen port"
+    )
+
+    workers: int = Field(
+        default=1, ge=1, description="Update handling processes count"
+    )
+    worker_concurrency: int = Field(
+        default=64, ge=1, description="Concurrent updates per worker"
+    )
+    shard_queue_size: int = Field(
+        default=10000, ge=1, description="Worker process queue size"
+    )
+    updates_queue_size: int = Field(
+        default=1000, ge=1, description="Received not handled updates limit"
+    )
+    updates_store: UpdatesStoreEnum = Field(
+        default=UpdatesStoreEnum.memory,
+        description="Where received updates wait for handling",
+    )
+    update_max_attempts: int = Field(
+        default=5,
+        ge=1,
+        description="Failed handlings before a stored update is dead",
+    )
+
+    @model_validator(mode="after")
+    def validate_webhook(cls, values: Any):
+        if (
+            values.run_mode == BotRunModeEnum.webhook
+            and not values.webhook_url
+        ):
+            raise ValueError("Webhook url is required in webhook mode")
+        if (
+            values.run_mode == BotRunModeEnum.webhook
+            and not values.webhook_secret
+        ):
+            # without it anyone knowing the url can post updates
+            raise ValueError("Webhook secret is required in webhook mode")
+        return values
+
+    @property
+    def webhook_full_url(self) -> str:
+        return f"{self.webhook_url.rstrip('/')}{self.webhook_path}"
+
 
 class PaymentSettings(BaseSettings):
     """Payment settings"""
@@ -78,6 +167,17 @@ class LogSettings(BaseSettings):
         default="/logs/bot", description="Log files storage path"
     )
     level: str = Field(default="INFO", description="Logging level")
+    json_format: bool = Field(
+        default=False, description="JSON lines with the update context"
+    )
+    enqueue: bool = Field(
+        default=True, description="Write the logs in a background thread"
+    )
+    sample_limit: int = Field(
+        default=20,
+        ge=0,
+        description="Debug lines per call site per second, 0 - all",
+    )
 
     @model_validator(mode="after")
     def validate_log_level(cls, values: Any):
@@ -105,6 +205,36 @@ class DBSettings(BaseSettings):
     password: str = Field(min_length=1, description="Database password")
     name: str = Field(min_length=1, description="Database name")
 
+    bulk_chunk_size: int = Field(
+        default=1000, ge=1, description="Rows per bulk statement"
+    )
+    stream_batch_size: int = Field(
+        default=1000, ge=1, description="Rows per streaming fetch"
+    )
+    copy_threshold: int = Field(
+        default=10000, ge=1, description="Rows count to switch on COPY"
+    )
+
+    pool_size: int = Field(default=10, ge=1, description="Pool size")
+    pool_max_overflow: int = Field(
+        default=10, ge=0, description="Connections over the pool size"
+    )
+    pool_timeout: float = Field(
+        default=30, gt=0, description="Connection wait timeout in seconds"
+    )
+    pool_recycle: int = Field(
+        default=1800, description="Connection max age in seconds, -1 is off"
+    )
+    pool_pre_ping: bool = Field(
+        default=False, description="Check connections on checkout"
+    )
+    pool_warm_up: bool = Field(
+        default=True, description="Open pool connections on startup"
+    )
+    statement_cache_size: int = Field(
+        default=100, ge=0, description="asyncpg prepared statements cache"
+    )
+
     _driver: str = "asyncpg"
 
     @property
@@ -127,6 +257,164 @@ class ApiSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="api_")
 
     base_url: str = Field(description="3x-ui base url")
+    # checked on the first panel request, the bot runs without the panel
+    username: str | None = Field(default=None, description="3x-ui user")
+    password: str | None = Field(default=None, description="3x-ui password")
+    inbound_id: int = Field(
+        default=1, description="Inbound ID for the bot clients"
+    )
+    concurrency: int = Field(
+        default=10, ge=1, description="Concurrent requests to the panel"
+    )
+    timeout: float = Field(
+        default=10, gt=0, description="Panel request timeout in seconds"
+    )
+    sub_url: str | None = Field(
+        default=None,
+        description="3x-ui subscription base url, `{base_url}/sub` if null",
+    )
+
+    def subscription_link(self, sub_id: str) -> str:
+        sub_url = self.sub_url or f"{self.base_url.rstrip('/')}/sub"
+        return f"{sub_url.rstrip('/')}/{sub_id}"
+
+
+class CacheSettings(BaseSettings):
+    """In-memory caches settings"""
+
+    model_config = SettingsConfigDict(env_prefix="cache_")
+
+    tariff_ttl: int = Field(
+        default=300, ge=0, description="Tariff catalog TTL in seconds"
+    )
+    user_ttl: int = Field(
+        default=60, ge=0, description="Cached user profile TTL in seconds"
+    )
+    user_max_size: int = Field(
+        default=100000, ge=1, description="Cached user profiles limit"
+    )
+
+
+class SubscriptionSettings(BaseSettings):
+    """Subscriptions expiry settings"""
+
+    model_config = SettingsConfigDict(env_prefix="subscription_")
+
+    expiry_enabled: bool = Field(
+        default=True, description="Run the expiry scheduler"
+    )
+    expiry_batch_size: int = Field(
+        default=1000, ge=1, description="Subscriptions per expiry batch"
+    )
+    expiry_horizon: int = Field(
+        default=3600,
+        ge=1,
+        description="Subscriptions expiring within seconds kept in memory",
+    )
+
+
+class BroadcastSettings(BaseSettings):
+    """Broadcast settings"""
+
+    model_config = SettingsConfigDict(env_prefix="broadcast_")
+
+    # the rate and the flood control retries are the outgoing limiter ones
+    workers: int = Field(default=8, ge=1, description="Concurrent senders")
+    checkpoint_every: int = Field(
+        default=100, ge=1, description="Messages between progress saves"
+    )
+
+
+class ProvisioningSettings(BaseSettings):
+    """VPN clients provisioning after payment settings"""
+
+    model_config = SettingsConfigDict(env_prefix="provisioning_")
+
+    workers: int = Field(
+        default=4, ge=1, description="Concurrent provisioning jobs"
+    )
+    max_attempts: int = Field(
+        default=8, ge=1, description="Attempts before the job is failed"
+    )
+    backoff: float = Field(
+        default=5, gt=0, description="First retry delay in seconds"
+    )
+    max_backoff: float = Field(
+        default=600, gt=0, description="Retry delay limit in seconds"
+    )
+
+
+class ThrottlingSettings(BaseSettings):
+    """Telegram API rate limits settings"""
+
+    model_config = SettingsConfigDict(env_prefix="throttling_")
+
+    api_rate: float = Field(
+        default=30, gt=0, description="Outgoing requests per second"
+    )
+    api_chat_rate: float = Field(
+        default=1, gt=0, description="Outgoing requests per second to a chat"
+    )
+    api_group_rate: float = Field(
+        default=20 / 60,
+        gt=0,
+        description="Outgoing requests per second to a group chat",
+    )
+    api_chat_burst: int = Field(
+        default=3, ge=1, description="Requests to a chat without waiting"
+    )
+    api_max_retries: int = Field(
+        default=3, ge=0, description="Retries of a request after flood wait"
+    )
+
+    flood_period: float = Field(
+        default=5, gt=0, description="User flood sliding window in seconds"
+    )
+    flood_callback_limit: int = Field(
+        default=10, ge=1, description="User button presses per window"
+    )
+    flood_command_limit: int = Field(
+        default=5, ge=1, description="User messages per window"
+    )
+    flood_payment_limit: int = Field(
+        default=2, ge=1, description="User invoice requests per window"
+    )
+    flood_max_users: int = Field(
+        default=100000, ge=1, description="Users tracked by the limiter"
+    )
+
+
+class MetricsSettings(BaseSettings):
+    """Prometheus metrics settings"""
+
+    model_config = SettingsConfigDict(env_prefix="metrics_")
+
+    enabled: bool = Field(default=False, description="Collect metrics")
+    host: str = Field(
+        default="0.0.0.0", description="Metrics server listen host"
+    )
+    port: int = Field(
+        default=9090,
+        description="Front process port, shard worker N uses port + N + 1",
+    )
+    path: str = Field(default="/metrics", description="Metrics route path")
+
+
+class TracingSettings(BaseSettings):
+    """Update tracing and profiling settings"""
+
+    model_config = SettingsConfigDict(env_prefix="tracing_")
+
+    enabled: bool = Field(default=False, description="Trace the updates")
+    slow_threshold: float = Field(
+        default=1.0, gt=0, description="Log updates slower than, seconds"
+    )
+    max_spans: int = Field(
+        default=200, ge=1, description="Spans kept for one update"
+    )
+    profiler_interval: float = Field(
+        default=0.005, gt=0, description="Profiler sampling interval, seconds"
+    )
 
 
 class Settings(BaseSettings):
@@ -135,6 +423,17 @@ class Settings(BaseSettings):
     log: LogSettings = Field(default_factory=LogSettings)
     db: DBSettings = Field(default_factory=DBSettings)
     api: ApiSettings = Field(default_factory=ApiSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    subscription: SubscriptionSettings = Field(
+        default_factory=SubscriptionSettings
+    )
+    broadcast: BroadcastSettings = Field(default_factory=BroadcastSettings)
+    throttling: ThrottlingSettings = Field(default_factory=ThrottlingSettings)
+    provisioning: ProvisioningSettings = Field(
+        default_factory=ProvisioningSettings
+    )
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    tracing: TracingSettings = Field(default_factory=TracingSettings)
 
 
 class AlembicSettings(BaseSettings):
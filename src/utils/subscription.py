@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+from contextlib import suppress
+from datetime import datetime, timedelta
+from functools import cache
+from uuid import UUID
+
+from loguru import logger
+
+from src.crud.user import get_user_crud
+from src.crud.user_tariff import get_user_tariff_crud
+from src.database.database import AsyncSessionLocal
+from src.utils.settings import get_settings
+
+# expire datetime, subscription ID, user ID
+Expiry = tuple[datetime, UUID, int]
+
+
+class ExpiryScheduler:
+    """Expires subscriptions in the background.
+
+    Subscriptions expiring within the horizon are loaded by batches
+    in the expiry order (partial index scan) into a min-heap.
+    The scheduler sleeps till the nearest expiry and processes all due
+    subscriptions by bulk UPDATEs, so the database is touched per
+    expiries batch, not per user.
+
+    Processing is idempotent: a scheduler of another bot instance
+    does no harm"""
+
+    def __init__(
+        self, batch_size: int, horizon: float, retry_interval: float = 60
+    ):
+        self._batch_size = batch_size
+        self._horizon = timedelta(seconds=horizon)
+        self._retry_interval = retry_interval
+        self._heap: list[Expiry] = []
+        # all not processed subscriptions expiring before are in the heap
+        self._loaded_until: datetime | None = None
+        self._wake_up = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run(), name="expiry-scheduler")
+        logger.info("Subscription expiry scheduler started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._reset()
+        logger.info("Subscription expiry scheduler stopped")
+
+    def schedule(
+        self, subscription_id: UUID, user_id: int, expire_datetime: datetime
+    ):
+        """Track a subscription created after the last load"""
+        if self._loaded_until is None or expire_datetime > self._loaded_until:
+            # will be loaded from the database in its turn
+            return
+        heapq.heappush(self._heap, (expire_datetime, subscription_id, user_id))
+        self._wake_up.set()
+
+    def _reset(self):
+        self._heap.clear()
+        self._loaded_until = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except Exception as e:
+                logger.exception(f"Subscriptions expiry failed: {e}")
+                # not processed subscriptions are still in the database
+                self._reset()
+                await asyncio.sleep(self._retry_interval)
+
+    async def _tick(self):
+        now = datetime.now()
+        if not self._heap and (
+            self._loaded_until is None or self._loaded_until <= now
+        ):
+            await self._load(now)
+
+        if due := self._pop_due(now):
+            await self._expire(due, now)
+            return
+
+        wake_at = self._heap[0][0] if self._heap else self._loaded_until
+        self._wake_up.clear()
+        with suppress(TimeoutError):
+            await asyncio.wait_for(
+                self._wake_up.wait(), (wake_at - now).total_seconds()
+            )
+
+    async def _load(self, now: datetime):
+        before = now + self._horizon
+        async with AsyncSessionLocal() as session:
+            subscriptions = await get_user_tariff_crud().get_expiring_raw(
+                session, before=before, limit=self._batch_size
+            )
+        for subscription in subscriptions:
+            heapq.heappush(
+                self._heap,
+                (
+                    subscription.expire_datetime,
+                    subscription.id,
+                    subscription.user_id,
+                ),
+            )
+        if len(subscriptions) < self._batch_size:
+            self._loaded_until = before
+        else:
+            # the rest is loaded after this batch is processed
+            self._loaded_until = subscriptions[-1].expire_datetime
+        logger.trace(
+            "Expiring subscriptions loaded: {}, till {}",
+            len(subscriptions),
+            self._loaded_until,
+        )
+
+    def _pop_due(self, now: datetime) -> list[Expiry]:
+        due = []
+        while (
+            self._heap
+            and self._heap[0][0] <= now
+            and len(due) < self._batch_size
+        ):
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    @staticmethod
+    async def _expire(due: list[Expiry], now: datetime):
+        async with AsyncSessionLocal() as session:
+            await get_user_tariff_crud().set_expired(
+                session, [subscription_id for _, subscription_id, _ in due]
+            )
+            user_ids = await get_user_crud().set_not_paid(
+                session, list({user_id for *_, user_id in due}), now
+            )
+            await session.commit()
+        logger.info(
+            f"Subscriptions expired: {len(due)}, "
+            f"users moved to not paid: {len(user_ids)}"
+        )
+
+
+@cache
+def get_expiry_scheduler() -> ExpiryScheduler:
+    settings = get_settings().subscription
+    return ExpiryScheduler(settings.expiry_batch_size, settings.expiry_horizon)
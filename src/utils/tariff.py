@@ -0,0 +1,104 @@
+import asyncio
+from collections.abc import Callable
+from functools import cache
+from time import monotonic
+from typing import TypeVar
+
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.crud.tariff import get_tariff_crud
+from src.database.database import AsyncSessionLocal
+from src.models.tariff import Tariff
+from src.schemas.tariff import TariffSchema
+from src.utils.settings import get_settings
+
+ViewType = TypeVar("ViewType")
+
+
+class TariffCatalog:
+    """In-memory tariffs catalog.
+
+    Tariffs are loaded once and reloaded after TTL or `invalidate`,
+    views (f.e. keyboards) are built once per loaded version"""
+
+    def __init__(self, ttl: float):
+        self._ttl = ttl
+        self._tariffs: list[TariffSchema] = []
+        self._by_id: dict[int, TariffSchema] = {}
+        self._views: dict[Callable, ...] = {}
+        self._loaded_at: float | None = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or monotonic() - self._loaded_at > self._ttl
+        )
+
+    async def load(self):
+        async with AsyncSessionLocal() as session:
+            tariffs = await get_tariff_crud().get_multi(
+                session, order_by=Tariff.days
+            )
+        self._tariffs = tariffs
+        self._by_id = {tariff.id: tariff for tariff in tariffs}
+        self._views = {}
+        self._loaded_at = monotonic()
+        self._version += 1
+        logger.debug("Tariff catalog loaded. Tariffs: {}", len(tariffs))
+
+    async def refresh(self):
+        if not self.is_stale:
+            return
+        async with self._lock:
+            if not self.is_stale:
+                return
+            try:
+                await self.load()
+            except SQLAlchemyError as e:
+                if self._version == 0:
+                    raise
+                # stale tariffs are better than no tariffs
+                logger.error(f"Tariff catalog reload failed: {e}")
+
+    def invalidate(self):
+        """Reload on the next call, the loaded tariffs are kept
+        in case the reload fails"""
+        self._loaded_at = None
+
+    async def reload(self) -> list[TariffSchema]:
+        """Load the tariffs now, f.e. after they are edited in the database.
+        A database error is raised, the loaded tariffs are kept"""
+        self.invalidate()
+        async with self._lock:
+            await self.load()
+        return self._tariffs
+
+    async def get_all(self) -> list[TariffSchema]:
+        await self.refresh()
+        return self._tariffs
+
+    async def get(self, tariff_id: int) -> TariffSchema | None:
+        await self.refresh()
+        return self._by_id.get(tariff_id)
+
+    async def render(
+        self, builder: Callable[[list[TariffSchema]], ViewType]
+    ) -> ViewType:
+        """Build a view of the tariffs once per catalog version"""
+        await self.refresh()
+        if (view := self._views.get(builder)) is None:
+            view = self._views[builder] = builder(self._tariffs)
+        return view
+
+
+@cache
+def get_tariff_catalog() -> TariffCatalog:
+    return TariffCatalog(get_settings().cache.tariff_ttl)
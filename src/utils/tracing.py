@@ -0,0 +1,202 @@
+import os
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import cache, wraps
+from time import perf_counter, sleep
+
+from src.utils.settings import get_settings
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    depth: int
+    start: float
+    duration: float = 0.0
+
+
+@dataclass(slots=True)
+class Trace:
+    """Timeline of one update handling"""
+
+    name: str
+    max_spans: int
+    start: float = field(default_factory=perf_counter)
+    duration: float = 0.0
+    spans: list[Span] = field(default_factory=list)
+    dropped: int = 0
+    depth: int = 0
+    finished: bool = False
+
+    def report(self) -> str:
+        """Spans breakdown: start offset, duration and name"""
+        lines = [f"{self.name}: {self.duration * 1000:.1f} ms"]
+        accounted = 0.0
+        for span in self.spans:
+            if span.depth == 0:
+                accounted += span.duration
+            lines.append(
+                f"{(span.start - self.start) * 1000:>9.1f} ms "
+                f"{span.duration * 1000:>9.1f} ms  "
+                f"{'  ' * span.depth}{span.name}"
+            )
+        if self.dropped:
+            lines.append(f"{'':>25}{self.dropped} more spans dropped")
+        lines.append(
+            f"{'':>12}{(self.duration - accounted) * 1000:>9.1f} ms  "
+            "outside spans (handler code, event loop wait)"
+        )
+        return "\n".join(lines)
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar(
+    "current_trace", default=None
+)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, max_spans: int = 200) -> Iterator[Trace]:
+    """Collect the spans of the code running in the context"""
+    current = Trace(name, max_spans)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = perf_counter() - current.start
+        # tasks started in the context keep it, not the spans
+        current.finished = True
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """A child span of the current trace, no-op without a trace"""
+    if (current := _current_trace.get()) is None or current.finished:
+        yield
+        return
+    if len(current.spans) >= current.max_spans:
+        current.dropped += 1
+        yield
+        return
+    child = Span(name, current.depth, perf_counter())
+    current.spans.append(child)
+    current.depth += 1
+    try:
+        yield
+    finally:
+        current.depth -= 1
+        child.duration = perf_counter() - child.start
+
+
+def traced(name: str) -> Callable:
+    """Coroutine function decorator, runs the call in a span"""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if (current := _current_trace.get()) is None or current.finished:
+                return await func(*args, **kwargs)
+            with span(name):
+                return await func(*args, **kwargs)
+
+        # the not traced function
+        wrapper.__traced__ = func
+        return wrapper
+
+    return decorator
+
+
+class SamplingProfiler:
+    """Statistical profiler of the event loop thread.
+
+    A background thread takes the loop thread stack every `interval`
+    seconds, so the overhead doesn't depend on the code being run.
+    Stacks are counted in the collapsed format (flame graph tools)"""
+
+    def __init__(self, interval: float, max_depth: int = 64):
+        self._interval = interval
+        self._max_depth = max_depth
+        self._stacks: Counter[str] = Counter()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._target: int | None = None
+        self.started_at: float | None = None
+        self.samples = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Profile the calling thread (the event loop one)"""
+        if self.is_running:
+            return
+        self._stacks.clear()
+        self.samples = 0
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self.started_at = perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._stacks[self._collapse(frame)] += 1
+                self.samples += 1
+            sleep(self._interval)
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self._max_depth:
+            code = frame.f_code
+            file_name = os.path.basename(code.co_filename)
+            names.append(
+                f"{code.co_qualname} ({file_name}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def collapsed(self) -> str:
+        """`frame;frame;frame count` lines"""
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self._stacks.most_common()
+        )
+
+    def top(self, limit: int = 15) -> list[tuple[str, int, int]]:
+        """Functions by the own samples: name, own samples, total samples"""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [
+            (name, count, total[name])
+            for name, count in own.most_common(limit)
+        ]
+
+
+@cache
+def get_profiler() -> SamplingProfiler:
+    return SamplingProfiler(get_settings().tracing.profiler_interval)
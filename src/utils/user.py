@@ -1,23 +1,87 @@
+from functools import cache
+
 from loguru import logger
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.exc import SQLAlchemyError
 
 from src.crud.user import get_user_crud
 from src.database.database import AsyncSessionLocal
-from src.schemas.user import UserSchemaCreate
+from src.schemas.user import UserSchema, UserSchemaCreate
+from src.utils.cache import get_user_cache
 from src.utils.settings import StatusTypeEnum
 
 
+class KnownUsers:
+    """Telegram IDs of the users already stored in the database.
+
+    Filled from the database on startup and by `add_user`,
+    so returning users don't touch the database"""
+
+    def __init__(self):
+        self._ids: set[int] = set()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, user_id: int):
+        self._ids.add(user_id)
+
+    async def warm_up(self):
+        async with AsyncSessionLocal() as session:
+            async for batch in get_user_crud().stream_ids(session):
+                self._ids.update(batch)
+        logger.debug("Known users loaded. Users: {}", len(self._ids))
+
+
+@cache
+def get_known_users() -> KnownUsers:
+    return KnownUsers()
+
+
 async def add_user(user_id: int):
+    known_users = get_known_users()
+    if user_id in known_users:
+        logger.trace("User with ID: {} already exist", user_id)
+        return
+
     try:
         async with AsyncSessionLocal() as session:
-            await get_user_crud().create_with_commit(
+            created = await get_user_crud().create_or_ignore(
                 session,
                 obj_in=UserSchemaCreate(id=user_id, status=StatusTypeEnum.new),
             )
-        logger.debug(f"Create new user. Id: {user_id}")
-    except IntegrityError:
-        logger.trace(f"User with ID: {user_id} already exist")
+            await session.commit()
     except SQLAlchemyError as e:
         logger.error(
             f"Unhandled sqlalchemy error while command 'start' handling: {e}"
         )
+        return
+
+    known_users.add(user_id)
+    if created:
+        logger.debug("Create new user. Id: {}", user_id)
+    else:
+        logger.trace("User with ID: {} already exist", user_id)
+
+
+async def get_user(user_id: int) -> UserSchema | None:
+    """User profile, from the cache if possible"""
+    user_cache = get_user_cache()
+    if (user := user_cache.get(user_id)) is not None:
+        return user
+
+    generation = user_cache.generation
+    try:
+        async with AsyncSessionLocal() as session:
+            users = await get_user_crud().get_multi(
+                session, limit=1, id=user_id
+            )
+    except SQLAlchemyError as e:
+        logger.error(f"Unhandled sqlalchemy error while get user: {e}")
+        return None
+    if not users:
+        return None
+    user_cache.set(user_id, users[0], generation)
+    return users[0]
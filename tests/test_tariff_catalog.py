@@ -0,0 +1,74 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from sqlalchemy.exc import OperationalError
+
+from src.bot.msg import user_msg
+from src.bot.routes.admin_routes import tariffs_cmd
+from src.schemas.tariff import TariffSchema
+from src.utils.tariff import get_tariff_catalog
+
+
+def tariff(id_: int, days: int) -> TariffSchema:
+    return TariffSchema(
+        id=id_, days=days, price=days * 5, create_datetime=datetime.now()
+    )
+
+
+class FakeTariffCrud:
+    """The tariffs table stand-in"""
+
+    def __init__(self):
+        self.tariffs = [tariff(1, 30)]
+        self.error: Exception | None = None
+
+    async def get_multi(self, session, **kwargs) -> list[TariffSchema]:
+        if self.error is not None:
+            raise self.error
+        return list(self.tariffs)
+
+
+class FakeMessage:
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=1)
+        self.answers: list[str] = []
+
+    async def answer(self, text: str):
+        self.answers.append(text)
+
+
+class TariffsCommandTest(IsolatedAsyncioTestCase):
+    def setUp(self):
+        get_tariff_catalog.cache_clear()
+        self.crud = FakeTariffCrud()
+        patcher = patch("src.utils.tariff.get_tariff_crud", lambda: self.crud)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(get_tariff_catalog.cache_clear)
+
+    async def test_reload_shows_edited_tariffs(self):
+        catalog = get_tariff_catalog()
+        self.assertEqual(len(await catalog.get_all()), 1)
+        self.crud.tariffs.append(tariff(2, 90))
+        # cached till the TTL
+        self.assertEqual(len(await catalog.get_all()), 1)
+
+        message = FakeMessage()
+        await tariffs_cmd(message)
+
+        self.assertEqual([t.id for t in await catalog.get_all()], [1, 2])
+        self.assertIn("90", message.answers[0])
+
+    async def test_failed_reload_keeps_tariffs(self):
+        catalog = get_tariff_catalog()
+        await catalog.get_all()
+        self.crud.error = OperationalError("SELECT", {}, Exception("down"))
+
+        message = FakeMessage()
+        await tariffs_cmd(message)
+
+        self.assertEqual(message.answers, [user_msg.COMMON_ERROR_MSG])
+        # stale tariffs are served while the database is down
+        self.assertEqual([t.id for t in await catalog.get_all()], [1])
@@ -0,0 +1,59 @@
+from unittest import IsolatedAsyncioTestCase
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.crud.user import get_user_crud
+from src.database.database import AsyncSessionLocal, dispose_engines
+from src.utils.settings import StatusTypeEnum
+
+# far away from real Telegram IDs
+USER_ID = 10**15
+
+
+class UpsertTest(IsolatedAsyncioTestCase):
+    """Needs the configured database, every test is rolled back"""
+
+    async def asyncSetUp(self):
+        # pooled connections belong to the event loop of the test
+        self.addAsyncCleanup(dispose_engines)
+        self.session = AsyncSessionLocal()
+        self.addAsyncCleanup(self.session.close)
+        self.addAsyncCleanup(self.session.rollback)
+        try:
+            await self.session.execute(text("SELECT 1"))
+        except (OSError, SQLAlchemyError) as e:
+            self.skipTest(f"No database: {e}")
+        self.crud = get_user_crud()
+
+    async def test_upsert_many_duplicate_keys(self):
+        users = await self.crud.upsert_many(
+            self.session,
+            objs_in=[
+                {"id": USER_ID, "status": StatusTypeEnum.new},
+                {"id": USER_ID + 1, "status": StatusTypeEnum.new},
+                {"id": USER_ID, "status": StatusTypeEnum.paid},
+            ],
+        )
+
+        statuses = {user.id: user.status for user in users}
+        self.assertEqual(
+            statuses,
+            {USER_ID: StatusTypeEnum.paid, USER_ID + 1: StatusTypeEnum.new},
+        )
+
+    async def test_upsert_an_obj_inserts_then_updates(self):
+        inserted = await self.crud.upsert_an_obj(
+            self.session, ["id"], {"id": USER_ID, "status": StatusTypeEnum.new}
+        )
+        self.assertEqual(inserted.status, StatusTypeEnum.new)
+
+        updated = await self.crud.upsert_an_obj(
+            self.session,
+            ["id"],
+            {"id": USER_ID, "status": StatusTypeEnum.paid, "link": "x"},
+        )
+
+        self.assertEqual(updated.status, StatusTypeEnum.paid)
+        user = await self.crud.get_one_raw(self.session, id=USER_ID)
+        self.assertEqual((user.status, user.link), (StatusTypeEnum.paid, "x"))